@@ -1,9 +1,19 @@
 #!/usr/bin/env python3
 """Hypermedia of pagination sample 
 """
-import csv
+import asyncio
+import functools
 import math
-from typing import Dict, List, Tuple
+import threading
+from bisect import bisect_right
+from typing import IO, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from columnar_dataset import ColumnarDataset
+from dataset_backends import load_dataset
+from dataset_export import WRITERS, iter_chunks, iter_csv_rows, read_header
+from dataset_snapshot import SnapshotError, read_snapshot, write_snapshot
+from secondary_index import SecondaryIndex
+from shared_dataset import SharedDataset
 
 
 def index_range(page: int, page_size: int) -> Tuple[int, int]:
@@ -19,45 +29,240 @@ class Server:
     """
     DATA_FILE = "Popular_Baby_Names.csv"
 
-    def __init__(self):
+    def __init__(self, backend: str = "list", warm: bool = False):
         """Initializes a new Server instance.
+        `backend` names how the dataset is held in memory, "list" for
+        plain rows, "columnar" for the compact column store or "mmap" to
+        decode rows lazily from the mapped CSV file. With `warm`, the
+        dataset starts loading in a background thread right away.
         """
+        self.backend = backend
         self.__dataset = None
+        self.__indexes = {}
+        self.__indexes_generation = None
+        self.__lock = threading.RLock()
+        if warm:
+            threading.Thread(target=self.dataset, daemon=True,
+                             name="Server-warm-up").start()
+
+    @classmethod
+    def attach_shared(cls, name: str) -> "Server":
+        """Creates a Server reading the dataset a `SharedDatasetPublisher`
+        publishes under `name`, following its reloads.
+        """
+        server = cls("columnar")
+        server.__dataset = SharedDataset(name)
+        return server
+
+    @classmethod
+    def from_snapshot(cls, path: str, regenerate: bool = True) -> "Server":
+        """Creates a Server whose dataset is mapped from a binary snapshot.
+        A missing, invalid or stale snapshot is regenerated from the CSV
+        file unless `regenerate` is False.
+        """
+        server = cls("columnar")
+        try:
+            server.__dataset = read_snapshot(path, source=cls.DATA_FILE)
+        except (OSError, SnapshotError):
+            if not regenerate:
+                raise
+            server.write_snapshot(path)
+        return server
+
+    def write_snapshot(self, path: str) -> None:
+        """Writes the dataset to a binary snapshot, see `from_snapshot`.
+        """
+        dataset = self.dataset()
+        if not isinstance(dataset, ColumnarDataset):
+            dataset = ColumnarDataset.from_rows(dataset)
+        write_snapshot(dataset, path, source=self.DATA_FILE)
 
     def dataset(self) -> List[List]:
-        """Cached dataset
+        """Cached dataset, loaded once even when many threads ask for it
+        at the same time.
         """
         if self.__dataset is None:
-            with open(self.DATA_FILE) as f:
-                reader = csv.reader(f)
-                dataset = [row for row in reader]
-            self.__dataset = dataset[1:]
+            with self.__lock:
+                if self.__dataset is None:
+                    self.__dataset = load_dataset(self.DATA_FILE,
+                                                  self.backend)
 
         return self.__dataset
 
-    def get_page(self, page: int = 1, page_size: int = 10) -> List[List]:
+    def _generation(self):
+        """Generation of a shared dataset, attaching to the latest one,
+        or None for a dataset that is never reloaded.
+        """
+        dataset = self.dataset()
+        if isinstance(dataset, SharedDataset):
+            dataset.current()
+            return dataset.generation
+        return None
+
+    def _indexes(self) -> Dict:
+        """Cached secondary indexes, dropped when a shared dataset moves
+        to a new generation.
+        """
+        generation = self._generation()
+        if generation != self.__indexes_generation:
+            with self.__lock:
+                if generation != self.__indexes_generation:
+                    self.__indexes = {}
+                    self.__indexes_generation = generation
+        return self.__indexes
+
+    def secondary_index(self, sort: str = None) -> SecondaryIndex:
+        """Cached secondary indexes over the dataset sorted on `sort`
+        """
+        indexes = self._indexes()
+        if sort not in indexes:
+            with self.__lock:
+                if sort not in indexes:
+                    indexes[sort] = SecondaryIndex(self.dataset(), sort)
+        return indexes[sort]
+
+    def _selection(self, filters: Dict, sort: str) -> Sequence[int]:
+        """Sorted positions of the rows matching `filters`.
+        """
+        return self.secondary_index(sort).select(filters)
+
+    def get_page(self, page: int = 1, page_size: int = 10,
+                 filters: Dict = None, sort: str = None) -> List[List]:
         """Retrieves a page of data.
+        `filters` maps "year", "gender", "ethnicity" or "name_prefix" to
+        the value rows must match and `sort` names the column to order
+        rows by, prefixed with "-" for descending order.
         """
         assert type(page) == int and type(page_size) == int
         assert page > 0 and page_size > 0
         start, end = index_range(page, page_size)
         data = self.dataset()
+        if filters or sort:
+            index = self.secondary_index(sort)
+            return index.rows(data, index.select(filters), start, end)
         if start > len(data):
             return []
         return data[start:end]
 
-    def get_hyper(self, page: int = 1, page_size: int = 10) -> Dict:
+    def get_hyper(self, page: int = 1, page_size: int = 10,
+                  filters: Dict = None, sort: str = None) -> Dict:
         """Retrieves information about a page.
         """
-        page_data = self.get_page(page, page_size)
+        page_data = self.get_page(page, page_size, filters, sort)
         start, end = index_range(page, page_size)
-        total_pages = math.ceil(len(self.__dataset) / page_size)
+        if filters or sort:
+            total = len(self._selection(filters, sort))
+        else:
+            total = len(self.__dataset)
+        total_pages = math.ceil(total / page_size)
         page_info = {
             'page_size': len(page_data),
             'page': page,
             'data': page_data,
-            'next_page': page + 1 if end < len(self.__dataset) else None,
+            'next_page': page + 1 if end < total else None,
             'prev_page': page - 1 if start > 0 else None,
             'total_pages': total_pages,
         }
         return page_info
+
+    async def aget_hyper(self, page: int = 1, page_size: int = 10,
+                         filters: Dict = None, sort: str = None) -> Dict:
+        """`get_hyper` for asyncio code. Calls that would first have to
+        load the dataset or build an index run in the default executor,
+        so they never block the event loop.
+        """
+        if (self.__dataset is None
+                or (filters or sort) and sort not in self._indexes()):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, functools.partial(
+                self.get_hyper, page, page_size, filters, sort))
+        return self.get_hyper(page, page_size, filters, sort)
+
+    def get_pages(self, requests: Iterable[Tuple[int, int]]) -> List[List]:
+        """Retrieves the pages for many `(page, page_size)` pairs at once.
+        The batch is validated up front. On backends building their rows,
+        overlapping or adjacent ranges are read from the dataset once, so
+        pages share their row objects; plain lists are sliced directly.
+        """
+        requests = list(requests)
+        for page, page_size in requests:
+            assert type(page) == int and type(page_size) == int
+            assert page > 0 and page_size > 0
+        data = self.dataset()
+        if isinstance(data, list):
+            return [data[(page - 1) * page_size:page * page_size]
+                    for page, page_size in requests]
+        size = len(data)
+        ranges = []
+        for page, page_size in requests:
+            start, end = index_range(page, page_size)
+            ranges.append((min(start, size), min(end, size)))
+        starts, spans = [], []
+        for start, end in sorted(set(ranges)):
+            if spans and start <= spans[-1][1]:
+                spans[-1][1] = max(spans[-1][1], end)
+            else:
+                starts.append(start)
+                spans.append([start, end])
+        rows = [data[start:end] for start, end in spans]
+        pages = []
+        for start, end in ranges:
+            i = bisect_right(starts, start) - 1
+            pages.append(rows[i][start - starts[i]:end - starts[i]])
+        return pages
+
+    def get_hypers(self, requests: Iterable[Tuple[int, int]]) -> List[Dict]:
+        """Retrieves information about many `(page, page_size)` pages at
+        once, see `get_pages`.
+        """
+        requests = list(requests)
+        pages = self.get_pages(requests)
+        total = len(self.__dataset)
+        hypers = []
+        for (page, page_size), page_data in zip(requests, pages):
+            start, end = index_range(page, page_size)
+            hypers.append({
+                'page_size': len(page_data),
+                'page': page,
+                'data': page_data,
+                'next_page': page + 1 if end < total else None,
+                'prev_page': page - 1 if start > 0 else None,
+                'total_pages': math.ceil(total / page_size),
+            })
+        return hypers
+
+    def iter_rows(self, source: str = "memory") -> Iterator[List]:
+        """Yields the rows one at a time, from the loaded dataset
+        ("memory") or streamed straight from the CSV file ("file").
+        """
+        assert source in ("memory", "file")
+        if source == "file":
+            return iter_csv_rows(self.DATA_FILE)
+        return iter(self.dataset())
+
+    def iter_pages(self, page_size: int = 10, start: int = 1,
+                   source: str = "memory") -> Iterator[List[List]]:
+        """Lazily yields the pages from page `start` on, holding a single
+        page in memory at a time.
+        """
+        assert type(start) == int and type(page_size) == int
+        assert start > 0 and page_size > 0
+        assert source in ("memory", "file")
+        skip = (start - 1) * page_size
+        if source == "file":
+            yield from iter_chunks(iter_csv_rows(self.DATA_FILE, skip),
+                                   page_size)
+            return
+        data = self.dataset()
+        for offset in range(skip, len(data), page_size):
+            yield data[offset:offset + page_size]
+
+    def export(self, fp: IO[str], fmt: str = "ndjson",
+               source: str = "memory", chunk_size: int = 1000) -> int:
+        """Streams every row to `fp` as "ndjson" or "csv", `chunk_size`
+        rows at a time, returning the number of rows written.
+        """
+        if fmt not in WRITERS:
+            raise ValueError("unknown export format: {}".format(fmt))
+        return WRITERS[fmt](self.iter_rows(source), fp,
+                            read_header(self.DATA_FILE), chunk_size)
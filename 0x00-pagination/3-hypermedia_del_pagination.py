@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 """Deletion of the resilient hypermedia pagination 
 """
-import csv
-from typing import Dict, List
+import secrets
+import threading
+from typing import Dict, List, MutableMapping
+
+from dataset_backends import IndexedRows, load_dataset
+from keyset_cursor import (KeysetIndex, SortKey, decode_cursor,
+                           encode_cursor, sort_key)
+from live_index import LiveIndex
 
 
 class Server:
@@ -10,52 +16,131 @@ class Server:
     """
     DATA_FILE = "Popular_Baby_Names.csv"
 
-    def __init__(self):
-        """ Initializes a new Server instance. 
+    def __init__(self, backend: str = "list", cursor_secret: bytes = None,
+                 warm: bool = False):
+        """ Initializes a new Server instance.
+        `backend` names how the dataset is held in memory, "list" for
+        plain rows, "columnar" for the compact column store or "mmap" to
+        decode rows lazily from the mapped CSV file. `cursor_secret` signs
+        the cursors of `get_page_by_cursor` and must be shared by every
+        worker serving them; a random one is used by default. With `warm`,
+        the indexed dataset starts loading in a background thread.
         """
+        self.backend = backend
+        self.cursor_secret = cursor_secret or secrets.token_bytes(32)
         self.__dataset = None
         self.__indexed_dataset = None
+        self.__live_index = None
+        self.__keyset_index = None
+        self.__lock = threading.RLock()
+        if warm:
+            threading.Thread(target=self.live_index, daemon=True,
+                             name="Server-warm-up").start()
 
     def dataset(self) -> List[List]:
-        """ Cached dataset 
+        """ Cached dataset, loaded once even when many threads ask for it
+        at the same time.
         """
         if self.__dataset is None:
-            with open(self.DATA_FILE) as f:
-                reader = csv.reader(f)
-                dataset = [row for row in reader]
-            self.__dataset = dataset[1:]
+            with self.__lock:
+                if self.__dataset is None:
+                    self.__dataset = load_dataset(self.DATA_FILE,
+                                                  self.backend)
 
         return self.__dataset
 
-    def indexed_dataset(self) -> Dict[int, List]:
-        """Dataset indexed by sorting position, starting at 0
+    def indexed_dataset(self) -> MutableMapping:
+        """Dataset indexed by sorting position, starting at 0, whose rows
+        are only built when read on the backends other than "list"
         """
         if self.__indexed_dataset is None:
-            dataset = self.dataset()
-            truncated_dataset = dataset[:1000]
-            self.__indexed_dataset = {
-                i: dataset[i] for i in range(len(dataset))
-            }
+            with self.__lock:
+                if self.__indexed_dataset is None:
+                    dataset = self.dataset()
+                    if isinstance(dataset, list):
+                        self.__indexed_dataset = {
+                            i: dataset[i] for i in range(len(dataset))
+                        }
+                    else:
+                        self.__indexed_dataset = IndexedRows(dataset)
         return self.__indexed_dataset
 
+    def live_index(self) -> LiveIndex:
+        """Index of the live keys of the indexed dataset
+        """
+        if self.__live_index is None:
+            with self.__lock:
+                if self.__live_index is None:
+                    self.__live_index = LiveIndex(
+                        self.indexed_dataset().keys())
+        return self.__live_index
+
+    def keyset_index(self) -> KeysetIndex:
+        """Index of the rows of the indexed dataset in sort key order
+        """
+        if self.__keyset_index is None:
+            with self.__lock:
+                if self.__keyset_index is None:
+                    self.__keyset_index = KeysetIndex(
+                        self.indexed_dataset().items())
+        return self.__keyset_index
+
+    def insert(self, row: List) -> int:
+        """Adds a row after all the existing ones, returning its index.
+        """
+        data = self.indexed_dataset()
+        live = self.live_index()
+        index = live.keys[-1] + 1 if len(live.keys) else 0
+        data[index] = row
+        live.append(index)
+        if self.__keyset_index is not None:
+            self.__keyset_index.insert(index, row)
+        return index
+
+    def delete(self, index: int) -> None:
+        """Deletes the row at a given index.
+        """
+        data = self.indexed_dataset()
+        if index not in data:
+            raise KeyError(index)
+        row = data.pop(index)
+        self.live_index().delete(index)
+        if self.__keyset_index is not None:
+            self.__keyset_index.remove(sort_key(index, row))
+
+    def _live_keys(self, index: int):
+        """Yields the keys still in the indexed dataset from a given
+        index on, dropping from the live index any key deleted straight
+        from the dictionary.
+        """
+        data = self.indexed_dataset()
+        live = self.live_index()
+        for key in live.iter_from(index):
+            if key in data:
+                yield key
+            else:
+                live.delete(key)
+
     def get_hyper_index(self, index: int = None, page_size: int = 10) -> Dict:
-        """ info about a page from a given index and with a 
+        """ info about a page from a given index and with a
         specified size.
         """
         data = self.indexed_dataset()
-        assert index is not None and index >= 0 and index <= max(data.keys())
-        page_data = []
-        data_count = 0
-        next_index = None
-        start = index if index else 0
-        for i, item in data.items():
-            if i >= start and data_count < page_size:
-                page_data.append(item)
-                data_count += 1
-                continue
-            if data_count == page_size:
-                next_index = i
+        live = self.live_index()
+        last = live.last()
+        while last is not None and last not in data:
+            live.delete(last)
+            last = live.last()
+        assert index is not None and index >= 0
+        # Once every row is deleted, any index gets the empty last page
+        assert last is None or index <= last
+        keys = []
+        for key in self._live_keys(index):
+            keys.append(key)
+            if len(keys) > page_size:
                 break
+        next_index = keys.pop() if len(keys) > page_size else None
+        page_data = [data[key] for key in keys]
         page_info = {
             'index': index,
             'next_index': next_index,
@@ -63,3 +148,60 @@ class Server:
             'data': page_data,
         }
         return page_info
+
+    def _keyset_page(self, key: SortKey, count: int,
+                     forward: bool) -> List[SortKey]:
+        """Up to `count` keys of live rows after (or before) `key`,
+        dropping from the keyset index the rows deleted straight from
+        the indexed dataset.
+        """
+        data = self.indexed_dataset()
+        keyset = self.keyset_index()
+        keys = []
+        while len(keys) < count:
+            wanted = count - len(keys)
+            if forward:
+                batch = keyset.after(key, wanted)
+            else:
+                batch = keyset.before(key, wanted)
+            if not batch:
+                break
+            for candidate in batch:
+                if candidate[-1] in data:
+                    keys.append(candidate)
+                else:
+                    keyset.remove(candidate)
+            key = batch[-1] if forward else batch[0]
+        return keys if forward else sorted(keys)
+
+    def get_page_by_cursor(self, cursor: str = None,
+                           page_size: int = 10) -> Dict:
+        """Retrieves the page a cursor points to, or the first page,
+        ordered by year, gender, ethnicity, rank and name.
+        """
+        assert type(page_size) == int and page_size > 0
+        data = self.indexed_dataset()
+        if cursor is None:
+            direction, key = "next", None
+        else:
+            direction, key = decode_cursor(self.cursor_secret, cursor)
+        forward = direction == "next"
+        keys = self._keyset_page(key, page_size + 1, forward)
+        more = len(keys) > page_size
+        if more:
+            keys = keys[:page_size] if forward else keys[1:]
+        next_cursor = prev_cursor = None
+        if keys:
+            if more if forward else self._keyset_page(keys[-1], 1, True):
+                next_cursor = encode_cursor(
+                    self.cursor_secret, "next", keys[-1])
+            if more if not forward else self._keyset_page(keys[0], 1, False):
+                prev_cursor = encode_cursor(
+                    self.cursor_secret, "prev", keys[0])
+        page_info = {
+            'page_size': len(keys),
+            'data': [data[key[-1]] for key in keys],
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor,
+        }
+        return page_info
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Columnar, memory-compact storage of the popular baby names dataset.
+"""
+import csv
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Dict, List, Tuple, Union
+
+
+# packed integer columns and their typecodes, in layout order
+PACKED_COLUMNS = (
+    ("years", "i"),
+    ("counts", "i"),
+    ("ranks", "i"),
+    ("gender_codes", "B"),
+    ("ethnicity_codes", "B"),
+    ("name_codes", "I"),
+)
+PACKED_TABLES = ("genders", "ethnicities", "names")
+# number of rows, then the offset and size of every column, and of the
+# string offsets and UTF-8 blob of every table
+PACKED_HEADER = struct.Struct(
+    "=Q" + "QQ" * (len(PACKED_COLUMNS) + 2 * len(PACKED_TABLES)))
+
+
+def _encode(value: str, table: List[str], codes: Dict[str, int]) -> int:
+    """Returns the code of a value in a dictionary-encoded column,
+    adding the (interned) value to the column's table if it is new.
+    """
+    code = codes.get(value)
+    if code is None:
+        code = len(table)
+        value = sys.intern(value)
+        table.append(value)
+        codes[value] = code
+    return code
+
+
+class StringTable(Sequence):
+    """Strings packed in one UTF-8 blob, decoded on access.
+    """
+
+    def __init__(self, offsets: Sequence[int], blob):
+        """Wraps the `len + 1` byte offsets of the strings in `blob`.
+        """
+        self.offsets = offsets
+        self.blob = blob
+
+    @staticmethod
+    def pack(strings: Sequence[str]) -> Tuple[array, bytes]:
+        """Encodes strings into their offsets and blob.
+        """
+        offsets = array('I', [0])
+        parts = []
+        for string in strings:
+            parts.append(string.encode("utf-8"))
+            offsets.append(offsets[-1] + len(parts[-1]))
+        return offsets, b"".join(parts)
+
+    def __len__(self) -> int:
+        """Number of strings in the table.
+        """
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        """Decodes the string at position `i`.
+        """
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+class ColumnarDataset(Sequence):
+    """Read-only, list-like dataset stored column by column.
+
+    Year, count and rank are kept in typed `array('i')` columns, gender
+    and ethnicity are dictionary-encoded categorical codes and first names
+    are codes into one shared pool of distinct names. Rows are only built,
+    in the same `List[str]` shape `csv.reader` yields, for the indexes or
+    slices that are actually requested.
+    """
+
+    def __init__(self, years: array, genders: Tuple[str, ...],
+                 gender_codes: array, ethnicities: Tuple[str, ...],
+                 ethnicity_codes: array, names: Tuple[str, ...],
+                 name_codes: array, counts: array, ranks: array):
+        """Initializes a dataset from already encoded columns.
+        """
+        self.years = years
+        self.genders = genders
+        self.gender_codes = gender_codes
+        self.ethnicities = ethnicities
+        self.ethnicity_codes = ethnicity_codes
+        self.names = names
+        self.name_codes = name_codes
+        self.counts = counts
+        self.ranks = ranks
+        self._views = []
+
+    @classmethod
+    def from_rows(cls, rows) -> "ColumnarDataset":
+        """Encodes an iterable of
+        `[year, gender, ethnicity, name, count, rank]` rows.
+        """
+        years, counts, ranks = array('i'), array('i'), array('i')
+        gender_codes, ethnicity_codes = array('B'), array('B')
+        name_codes = array('I')
+        genders, ethnicities, names = [], [], []
+        gender_index, ethnicity_index, name_index = {}, {}, {}
+        for year, gender, ethnicity, name, count, rank in rows:
+            years.append(int(year))
+            gender_codes.append(_encode(gender, genders, gender_index))
+            ethnicity_codes.append(
+                _encode(ethnicity, ethnicities, ethnicity_index))
+            name_codes.append(_encode(name, names, name_index))
+            counts.append(int(count))
+            ranks.append(int(rank))
+        return cls(years, tuple(genders), gender_codes, tuple(ethnicities),
+                   ethnicity_codes, tuple(names), name_codes, counts, ranks)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "ColumnarDataset":
+        """Loads and encodes a CSV file, skipping its header row.
+        """
+        with open(path) as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            return cls.from_rows(reader)
+
+    @classmethod
+    def from_buffer(cls, buffer, offset: int = 0) -> "ColumnarDataset":
+        """Wraps a dataset packed by `to_bytes` without copying it.
+
+        Columns and names stay views on `buffer` (e.g. an mmap or shared
+        memory block) until `release` is called.
+        """
+        view = memoryview(buffer)
+        fields = PACKED_HEADER.unpack_from(view, offset)
+        sections = []
+        for i in range(1, len(fields), 2):
+            start = offset + fields[i]
+            sections.append(view[start:start + fields[i + 1]])
+        columns = {}
+        for (name, typecode), section in zip(PACKED_COLUMNS, sections):
+            columns[name] = section.cast(typecode)
+        tables = {}
+        table_sections = sections[len(PACKED_COLUMNS):]
+        for i, name in enumerate(PACKED_TABLES):
+            offsets = table_sections[2 * i].cast('I')
+            tables[name] = StringTable(offsets, table_sections[2 * i + 1])
+        tables["genders"] = tuple(sys.intern(value)
+                                  for value in tables["genders"])
+        tables["ethnicities"] = tuple(sys.intern(value)
+                                      for value in tables["ethnicities"])
+        dataset = cls(genders=tables["genders"],
+                      ethnicities=tables["ethnicities"],
+                      names=tables["names"], **columns)
+        dataset._views = list(columns.values()) + [
+            tables["names"].offsets, tables["names"].blob] + sections + [view]
+        return dataset
+
+    def to_bytes(self) -> bytes:
+        """Packs the dataset into a buffer that `from_buffer` can wrap,
+        with every section aligned on 8 bytes.
+        """
+        sections = [bytes(getattr(self, name))
+                    for name, _ in PACKED_COLUMNS]
+        for name in PACKED_TABLES:
+            table = getattr(self, name)
+            if isinstance(table, StringTable):
+                sections.extend((bytes(table.offsets), bytes(table.blob)))
+            else:
+                offsets, blob = StringTable.pack(table)
+                sections.extend((bytes(offsets), blob))
+        fields = [len(self)]
+        body = []
+        position = PACKED_HEADER.size
+        for section in sections:
+            padding = -position % 8
+            body.append(b"\0" * padding)
+            position += padding
+            fields.extend((position, len(section)))
+            body.append(section)
+            position += len(section)
+        return PACKED_HEADER.pack(*fields) + b"".join(body)
+
+    def release(self) -> None:
+        """Releases the views a dataset from `from_buffer` holds on its
+        buffer, after which it can't be used anymore.
+        """
+        for view in self._views:
+            view.release()
+        self._views = []
+
+    def row(self, i: int) -> List[str]:
+        """Builds the row at position `i`.
+        """
+        return [
+            str(self.years[i]),
+            self.genders[self.gender_codes[i]],
+            self.ethnicities[self.ethnicity_codes[i]],
+            self.names[self.name_codes[i]],
+            str(self.counts[i]),
+            str(self.ranks[i]),
+        ]
+
+    def __len__(self) -> int:
+        """Number of rows in the dataset.
+        """
+        return len(self.years)
+
+    def __getitem__(self, index: Union[int, slice]):
+        """Builds a single row, or a list of rows for a slice.
+        """
+        if isinstance(index, slice):
+            return [self.row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("dataset index out of range")
+        return self.row(index)
+
+    def __iter__(self):
+        """Yields the rows one at a time.
+        """
+        for i in range(len(self)):
+            yield self.row(i)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Loaders for the dataset backends of the pagination servers.
+"""
+import csv
+from collections.abc import MutableMapping
+from typing import Callable, Dict, Iterator, List, Sequence
+
+from columnar_dataset import ColumnarDataset
+from mapped_dataset import MappedDataset
+
+
+def load_rows(path: str) -> List[List]:
+    """Loads a CSV file as a list of rows of strings, without its header.
+    """
+    with open(path) as f:
+        reader = csv.reader(f)
+        dataset = [row for row in reader]
+    return dataset[1:]
+
+
+BACKENDS: Dict[str, Callable[[str], Sequence[List]]] = {
+    "list": load_rows,
+    "columnar": ColumnarDataset.from_csv,
+    "mmap": MappedDataset,
+}
+
+
+def load_dataset(path: str, backend: str = "list") -> Sequence[List]:
+    """Loads a CSV file with the named backend.
+    """
+    if backend not in BACKENDS:
+        raise ValueError("unknown dataset backend: {}".format(backend))
+    return BACKENDS[backend](path)
+
+
+class IndexedRows(MutableMapping):
+    """Rows of a dataset by position, like the dict of an indexed dataset,
+    but holding only the live positions: each row is built from the
+    dataset when accessed, so that backends decoding rows on demand keep
+    their memory savings. Rows added afterwards are held as given.
+    """
+
+    def __init__(self, dataset: Sequence[List]):
+        """Indexes every row of a dataset.
+        """
+        self.dataset = dataset
+        # position: None for the dataset's row, else the row added
+        self.rows = dict.fromkeys(range(len(dataset)))
+
+    def __getitem__(self, index: int) -> List:
+        """Builds the row at a position.
+        """
+        row = self.rows[index]
+        return self.dataset[index] if row is None else row
+
+    def __setitem__(self, index: int, row: List) -> None:
+        """Adds or replaces the row at a position.
+        """
+        assert row is not None
+        self.rows[index] = row
+
+    def __delitem__(self, index: int) -> None:
+        """Deletes the row at a position.
+        """
+        del self.rows[index]
+
+    def __contains__(self, index) -> bool:
+        """Whether a position holds a row.
+        """
+        return index in self.rows
+
+    def __iter__(self) -> Iterator[int]:
+        """Yields the positions holding a row.
+        """
+        return iter(self.rows)
+
+    def __len__(self) -> int:
+        """Number of rows.
+        """
+        return len(self.rows)
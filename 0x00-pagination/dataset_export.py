@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Streaming iteration and chunked export of the dataset.
+"""
+import csv
+import json
+from itertools import islice
+from typing import IO, Iterable, Iterator, List, Optional
+
+
+def read_header(path: str) -> List[str]:
+    """Reads the header row of a CSV file.
+    """
+    with open(path, newline="") as f:
+        return next(csv.reader(f), [])
+
+
+def iter_csv_rows(path: str, skip: int = 0) -> Iterator[List[str]]:
+    """Yields the rows of a CSV file after its header, skipping `skip`
+    rows first, without loading the file.
+    """
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        yield from islice(reader, skip, None)
+
+
+def iter_chunks(rows: Iterable[List], size: int) -> Iterator[List[List]]:
+    """Groups rows in lists of `size` rows, the last one possibly shorter.
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_ndjson(rows: Iterable[List], fp: IO[str],
+                 header: Optional[List[str]] = None,
+                 chunk_size: int = 1000) -> int:
+    """Writes rows as newline-delimited JSON, one object per row keyed by
+    `header`, or one array per row without it.
+
+    Rows are written `chunk_size` at a time; returns how many were written.
+    """
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    written = 0
+    for chunk in iter_chunks(rows, chunk_size):
+        if header is not None:
+            chunk = [dict(zip(header, row)) for row in chunk]
+        fp.write("".join(encode(row) + "\n" for row in chunk))
+        written += len(chunk)
+    return written
+
+
+def write_csv(rows: Iterable[List], fp: IO[str],
+              header: Optional[List[str]] = None,
+              chunk_size: int = 1000) -> int:
+    """Writes rows as CSV, after `header` if given.
+
+    Rows are written `chunk_size` at a time; returns how many were written.
+    """
+    writer = csv.writer(fp, lineterminator="\n")
+    if header is not None:
+        writer.writerow(header)
+    written = 0
+    for chunk in iter_chunks(rows, chunk_size):
+        writer.writerows(chunk)
+        written += len(chunk)
+    return written
+
+
+WRITERS = {
+    "ndjson": write_ndjson,
+    "csv": write_csv,
+}
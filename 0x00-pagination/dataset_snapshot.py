@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Versioned, checksummed binary snapshots of the columnar dataset.
+"""
+import mmap
+import os
+import struct
+import zlib
+from typing import Optional
+
+from columnar_dataset import ColumnarDataset
+
+
+SNAPSHOT_MAGIC = b"BABYSNAP"
+SNAPSHOT_VERSION = 1
+# magic, format version, byte order marker, CRC32 of the payload, payload
+# size, then the mtime in ns and size of the CSV it was built from; the
+# packed dataset follows, 8-byte aligned
+SNAPSHOT_HEADER = struct.Struct("=8sHHIQqQ")
+BYTE_ORDER_MARK = 0x0102
+
+
+class SnapshotError(ValueError):
+    """Raised for a snapshot file that can't be loaded as is.
+    """
+
+
+def write_snapshot(dataset: ColumnarDataset, path: str,
+                   source: Optional[str] = None) -> None:
+    """Atomically writes a dataset to `path`, recording the mtime and size
+    of its `source` CSV file if given.
+    """
+    payload = dataset.to_bytes()
+    mtime_ns = size = 0
+    if source is not None:
+        stat = os.stat(source)
+        mtime_ns, size = stat.st_mtime_ns, stat.st_size
+    header = SNAPSHOT_HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_VERSION, BYTE_ORDER_MARK,
+        zlib.crc32(payload), len(payload), mtime_ns, size)
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(b"\0" * (-len(header) % 8))
+            f.write(payload)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_snapshot(path: str, source: Optional[str] = None,
+                  verify: bool = True) -> ColumnarDataset:
+    """Maps a snapshot and wraps its dataset without copying it.
+
+    Raises SnapshotError if the file is truncated, was written by another
+    format version or byte order, fails its checksum (when `verify`), or
+    is older than the current state of its `source` CSV file.
+    """
+    with open(path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise SnapshotError("empty snapshot: {}".format(path))
+    try:
+        if len(data) < SNAPSHOT_HEADER.size:
+            raise SnapshotError("truncated snapshot: {}".format(path))
+        (magic, version, byte_order, checksum, payload_size,
+         mtime_ns, size) = SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC or byte_order != BYTE_ORDER_MARK:
+            raise SnapshotError("not a snapshot: {}".format(path))
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError("unsupported snapshot version {}: {}".format(
+                version, path))
+        offset = SNAPSHOT_HEADER.size + (-SNAPSHOT_HEADER.size % 8)
+        if len(data) != offset + payload_size:
+            raise SnapshotError("truncated snapshot: {}".format(path))
+        if source is not None:
+            stat = os.stat(source)
+            if (mtime_ns, size) != (stat.st_mtime_ns, stat.st_size):
+                raise SnapshotError("stale snapshot: {}".format(path))
+        if verify:
+            with memoryview(data) as view:
+                with view[offset:] as payload:
+                    if zlib.crc32(payload) != checksum:
+                        raise SnapshotError(
+                            "corrupt snapshot: {}".format(path))
+        return ColumnarDataset.from_buffer(data, offset)
+    except BaseException:
+        data.close()
+        raise
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Keyset pagination over the baby names dataset with opaque cursors.
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+from bisect import bisect_left, bisect_right, insort
+from typing import Iterable, List, Tuple
+
+
+SortKey = Tuple
+CURSOR_TAG_SIZE = 16
+
+
+def sort_key(row_id: int, row: List) -> SortKey:
+    """Sort key of a row: year, gender, ethnicity, rank and name, with the
+    row id last so that duplicated rows still get distinct keys.
+    """
+    return (int(row[0]), row[1], row[2], int(row[5]), row[3], row_id)
+
+
+def encode_cursor(secret: bytes, direction: str, key: SortKey) -> str:
+    """Encodes a signed, URL-safe cursor seeking `direction` ("next" or
+    "prev") from `key`.
+    """
+    payload = json.dumps([direction, list(key)],
+                         separators=(",", ":")).encode("utf-8")
+    tag = hmac.new(secret, payload, hashlib.sha256).digest()
+    token = base64.urlsafe_b64encode(payload + tag[:CURSOR_TAG_SIZE])
+    return token.rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(secret: bytes, cursor: str) -> Tuple[str, SortKey]:
+    """Verifies and decodes a cursor into its direction and sort key.
+
+    Raises ValueError for cursors that are malformed or were not signed
+    with `secret`.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    except (binascii.Error, TypeError, ValueError):
+        raise ValueError("invalid cursor")
+    payload, tag = raw[:-CURSOR_TAG_SIZE], raw[-CURSOR_TAG_SIZE:]
+    expected = hmac.new(secret, payload, hashlib.sha256).digest()
+    if (len(raw) <= CURSOR_TAG_SIZE
+            or not hmac.compare_digest(tag, expected[:CURSOR_TAG_SIZE])):
+        raise ValueError("invalid cursor")
+    direction, key = json.loads(payload.decode("utf-8"))
+    if direction not in ("next", "prev"):
+        raise ValueError("invalid cursor")
+    return direction, tuple(key)
+
+
+class KeysetIndex:
+    """Sort keys of the rows kept in order, so that the rows right after
+    or right before any key are found with one O(log N) seek.
+
+    A key doesn't need to still be indexed to seek from it, so cursors
+    stay valid across inserts and deletes.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, List]]):
+        """Indexes `(row_id, row)` pairs.
+        """
+        self.keys = sorted(sort_key(row_id, row) for row_id, row in rows)
+
+    def __len__(self) -> int:
+        """Number of indexed rows.
+        """
+        return len(self.keys)
+
+    def insert(self, row_id: int, row: List) -> None:
+        """Adds a row to the index.
+        """
+        insort(self.keys, sort_key(row_id, row))
+
+    def remove(self, key: SortKey) -> bool:
+        """Drops a key from the index, returning whether it was indexed.
+        """
+        pos = bisect_left(self.keys, key)
+        if pos < len(self.keys) and self.keys[pos] == key:
+            del self.keys[pos]
+            return True
+        return False
+
+    def after(self, key: SortKey, count: int) -> List[SortKey]:
+        """Up to `count` keys following `key`, or from the start if
+        `key` is None.
+        """
+        pos = 0 if key is None else bisect_right(self.keys, key)
+        return self.keys[pos:pos + count]
+
+    def before(self, key: SortKey, count: int) -> List[SortKey]:
+        """Up to `count` keys preceding `key`, in order.
+        """
+        pos = bisect_left(self.keys, key)
+        return self.keys[max(0, pos - count):pos]
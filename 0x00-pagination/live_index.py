@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Deletion-resilient index over the keys of an indexed dataset.
+"""
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator, Optional
+
+
+class LiveIndex:
+    """Sorted keys with a tombstone per key and a Fenwick tree counting
+    the live ones.
+
+    Seeking to the first live key at or after any key and stepping to the
+    next live key both cost O(log N), however many keys were deleted.
+    """
+
+    def __init__(self, keys: Iterable[int]):
+        """Indexes the given keys, all of them live.
+        """
+        self.keys = array('q', sorted(keys))
+        size = len(self.keys)
+        self.alive = bytearray(b"\x01") * size
+        self.count = size
+        self.__tree = array('i', [0]) * (size + 1)
+        for i in range(1, size + 1):
+            self.__tree[i] += 1
+            parent = i + (i & -i)
+            if parent <= size:
+                self.__tree[parent] += self.__tree[i]
+        self.__top = 1 << size.bit_length() if size else 0
+
+    def _live_before(self, pos: int) -> int:
+        """Number of live keys in positions `0` to `pos - 1`.
+        """
+        total = 0
+        while pos > 0:
+            total += self.__tree[pos]
+            pos -= pos & -pos
+        return total
+
+    def _nth_live(self, n: int) -> int:
+        """Position of the `n`th live key, counting from 1.
+        """
+        pos = 0
+        step = self.__top
+        size = len(self.keys)
+        while step:
+            nxt = pos + step
+            if nxt <= size and self.__tree[nxt] < n:
+                pos = nxt
+                n -= self.__tree[nxt]
+            step >>= 1
+        return pos
+
+    def __contains__(self, key: int) -> bool:
+        """Whether `key` is indexed and not deleted.
+        """
+        pos = bisect_left(self.keys, key)
+        return (pos < len(self.keys) and self.keys[pos] == key
+                and self.alive[pos] == 1)
+
+    def __len__(self) -> int:
+        """Number of live keys.
+        """
+        return self.count
+
+    def append(self, key: int) -> None:
+        """Adds a live key greater than every indexed key.
+        """
+        assert not self.keys or key > self.keys[-1]
+        self.keys.append(key)
+        self.alive.append(1)
+        self.count += 1
+        size = len(self.keys)
+        self.__tree.append(1 + self._live_before(size - 1)
+                           - self._live_before(size - (size & -size)))
+        if size >= self.__top:
+            self.__top = 1 << size.bit_length()
+
+    def delete(self, key: int) -> bool:
+        """Marks `key` as deleted, returning whether it was live.
+        """
+        pos = bisect_left(self.keys, key)
+        if (pos == len(self.keys) or self.keys[pos] != key
+                or not self.alive[pos]):
+            return False
+        self.alive[pos] = 0
+        self.count -= 1
+        i = pos + 1
+        while i <= len(self.keys):
+            self.__tree[i] -= 1
+            i += i & -i
+        return True
+
+    def last(self) -> Optional[int]:
+        """The greatest live key, or None once everything is deleted.
+        """
+        if self.count == 0:
+            return None
+        return self.keys[self._nth_live(self.count)]
+
+    def iter_from(self, key: int) -> Iterator[int]:
+        """Yields the live keys greater than or equal to `key` in order.
+
+        Keys deleted while iterating are skipped.
+        """
+        pos = bisect_left(self.keys, key)
+        while True:
+            rank = self._live_before(pos)
+            if rank == self.count:
+                return
+            pos = self._nth_live(rank + 1)
+            yield self.keys[pos]
+            pos += 1
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Memory-mapped access to the rows of a CSV file through a byte-offset index.
+"""
+import csv
+import io
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import List, Union
+
+
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"ROWIDX1" + (b"<" if sys.byteorder == "little" else b">")
+# magic, source mtime in ns, source size in bytes, number of offsets
+INDEX_HEADER = struct.Struct("=8sqQQ")
+
+
+def build_offsets(data, start: int = 0) -> array:
+    """Finds the byte offset of every line in `data` from `start` on.
+
+    The result holds one more offset than there are lines, so line `i`
+    spans `offsets[i]:offsets[i + 1]`.
+    """
+    offsets = array('Q', [start])
+    size = len(data)
+    pos = start
+    while pos < size:
+        newline = data.find(b"\n", pos)
+        pos = size if newline == -1 else newline + 1
+        offsets.append(pos)
+    return offsets
+
+
+class MappedDataset(Sequence):
+    """Read-only, list-like dataset decoding rows straight from a mmapped
+    CSV file.
+
+    The byte offsets of the rows (header excluded) are kept in a sidecar
+    file next to the CSV, which is rebuilt whenever the CSV's mtime or
+    size changes, so opening an unchanged file costs the same whatever its
+    size. Only rows without quoted line breaks are supported.
+    """
+
+    def __init__(self, path: str, index_path: str = None):
+        """Maps the CSV file at `path` and loads or builds its row index.
+        """
+        self.path = path
+        self.index_path = index_path or path + INDEX_SUFFIX
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self._data = (mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                          if stat.st_size else b"")
+        self._index = None
+        self.offsets = self._load_index(stat)
+        if self.offsets is None:
+            header_end = self._data.find(b"\n")
+            start = len(self._data) if header_end == -1 else header_end + 1
+            self.offsets = build_offsets(self._data, start)
+            self._write_index(stat)
+
+    def _load_index(self, stat: os.stat_result):
+        """Maps the sidecar index if it matches the CSV file, else None.
+        """
+        try:
+            with open(self.index_path, "rb") as f:
+                index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if len(index) >= INDEX_HEADER.size:
+            magic, mtime_ns, size, count = INDEX_HEADER.unpack_from(index)
+            expected = INDEX_HEADER.size + count * 8
+            if (magic == INDEX_MAGIC and mtime_ns == stat.st_mtime_ns
+                    and size == stat.st_size and len(index) == expected
+                    and count > 0):
+                self._index = index
+                return memoryview(index)[INDEX_HEADER.size:].cast('Q')
+        index.close()
+        return None
+
+    def _write_index(self, stat: os.stat_result) -> None:
+        """Atomically writes the sidecar index, ignoring unwritable paths.
+        """
+        tmp_path = "{}.{}.tmp".format(self.index_path, os.getpid())
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(INDEX_HEADER.pack(INDEX_MAGIC, stat.st_mtime_ns,
+                                          stat.st_size, len(self.offsets)))
+                self.offsets.tofile(f)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _decode(self, start: int, stop: int) -> List[List]:
+        """Parses the rows in positions `start` to `stop`.
+        """
+        if start >= stop:
+            return []
+        chunk = self._data[self.offsets[start]:self.offsets[stop]]
+        text = io.StringIO(chunk.decode("utf-8"), newline="")
+        return list(csv.reader(text))
+
+    def __len__(self) -> int:
+        """Number of rows in the file, header excluded.
+        """
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: Union[int, slice]):
+        """Decodes a single row, or a list of rows for a slice.
+        """
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return self._decode(start, stop)
+            return [self[i] for i in range(start, stop, step)]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("dataset index out of range")
+        return self._decode(index, index + 1)[0]
+
+    def __iter__(self):
+        """Yields the rows one at a time, decoding them in chunks.
+        """
+        for start in range(0, len(self), 1024):
+            yield from self._decode(start, min(start + 1024, len(self)))
+
+    def close(self) -> None:
+        """Unmaps the CSV file and its index.
+        """
+        if isinstance(self.offsets, memoryview):
+            self.offsets.release()
+        if self._index is not None:
+            self._index.close()
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
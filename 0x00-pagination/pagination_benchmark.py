@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the pagination servers.
+
+Run from this directory, naming the benchmarks to run (all by default):
+    python3 pagination_benchmark.py hyper_index
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import timeit
+from typing import Callable, Dict, List
+
+
+def _per_call_us(func: Callable, number: int) -> float:
+    """Best average time of `func` in microseconds over a few runs.
+    """
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def bench_hyper_index(page_size: int = 10, number: int = 200) -> None:
+    """Latency of `get_hyper_index` at several positions of the dataset
+    with 10% and 50% of the rows deleted.
+    """
+    Server = __import__('3-hypermedia_del_pagination').Server
+    print("get_hyper_index, page_size={} (us/call)".format(page_size))
+    for fraction in (0.1, 0.5):
+        server = Server()
+        keys = list(server.indexed_dataset().keys())
+        rng = random.Random(0)
+        for key in rng.sample(keys, int(len(keys) * fraction)):
+            server.delete(key)
+        last = server.live_index().last()
+        row = []
+        for position in (0.0, 0.25, 0.5, 0.75, 0.99):
+            index = int(last * position)
+            row.append("{:>4.0%}: {:7.2f}".format(position, _per_call_us(
+                lambda: server.get_hyper_index(index, page_size), number)))
+        print("  {:.0%} deleted | {}".format(fraction, " | ".join(row)))
+
+
+def bench_startup(number: int = 20) -> None:
+    """Time to the first page of a new Server loading the CSV file with
+    each backend, or mapping a binary snapshot.
+    """
+    Server = __import__('2-hypermedia_pagination').Server
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dataset.snap")
+        Server("columnar").write_snapshot(path)
+        starts = [("csv, {}".format(backend),
+                   lambda backend=backend: Server(backend))
+                  for backend in ("list", "columnar", "mmap")]
+        starts.append(("snapshot", lambda: Server.from_snapshot(path)))
+        print("startup to first page (ms)")
+        for name, start in starts:
+            timings = []
+            for _ in range(number):
+                began = time.perf_counter()
+                start().get_page(1, 10)
+                timings.append(time.perf_counter() - began)
+            print("  {:<14} {:8.3f}".format(name, min(timings) * 1e3))
+
+
+def bench_batch(batch_size: int = 1000, number: int = 20) -> None:
+    """Throughput of `get_hyper` called once per page against one
+    `get_hypers` call for a batch of `batch_size` pages.
+    """
+    Server = __import__('2-hypermedia_pagination').Server
+    rng = random.Random(0)
+    print("{} pages per request (pages/s)".format(batch_size))
+    for backend in ("list", "columnar"):
+        server = Server(backend)
+        server.dataset()
+        requests = []
+        for _ in range(batch_size):
+            page_size = rng.choice((10, 20, 50))
+            page = rng.randint(1, len(server.dataset()) // page_size)
+            requests.append((page, page_size))
+        per_call = _per_call_us(
+            lambda: [server.get_hyper(*request) for request in requests],
+            number)
+        batched = _per_call_us(lambda: server.get_hypers(requests), number)
+        print("  {:<9} per call {:10.0f} | batched {:10.0f}".format(
+            backend, batch_size / per_call * 1e6, batch_size / batched * 1e6))
+
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {
+    "hyper_index": bench_hyper_index,
+    "startup": bench_startup,
+    "batch": bench_batch,
+}
+
+
+def main(names: List[str]) -> None:
+    """Runs the named benchmarks, or all of them.
+    """
+    for name in names or BENCHMARKS:
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
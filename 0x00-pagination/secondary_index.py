@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Secondary indexes for filtered and sorted pagination of the dataset.
+"""
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence
+
+
+# column of each sortable field and how its values compare
+SORT_FIELDS = {
+    "year": (0, int),
+    "gender": (1, str),
+    "ethnicity": (2, str),
+    "name": (3, str.casefold),
+    "count": (4, int),
+    "rank": (5, int),
+}
+FILTER_FIELDS = ("year", "gender", "ethnicity", "name_prefix")
+# name prefixes up to this length get their own posting lists
+PREFIX_DEPTH = 3
+SELECTION_CACHE_SIZE = 128
+
+
+def gallop(postings: Sequence[int], target: int, lo: int = 0) -> int:
+    """Position of the first value not lower than `target` in the sorted
+    `postings`, searching from `lo` with exponentially growing steps.
+    """
+    size = len(postings)
+    bound = 1
+    while lo + bound < size and postings[lo + bound] < target:
+        bound <<= 1
+    return bisect_left(postings, target, lo + (bound >> 1),
+                       min(lo + bound + 1, size))
+
+
+def intersect(lists: List[Sequence[int]]) -> array:
+    """Intersects sorted posting lists, galloping through the longer ones
+    while walking the shortest.
+    """
+    lists = sorted(lists, key=len)
+    shortest, others = lists[0], lists[1:]
+    cursors = [0] * len(others)
+    result = array('I')
+    for value in shortest:
+        for i, other in enumerate(others):
+            cursors[i] = gallop(other, value, cursors[i])
+            if cursors[i] == len(other):
+                return result
+            if other[cursors[i]] != value:
+                break
+        else:
+            result.append(value)
+    return result
+
+
+class SecondaryIndex:
+    """Posting lists on year, gender, ethnicity and name prefix over the
+    rows of a dataset ordered by one sort field.
+
+    Postings hold positions in the sorted order, so any selection is an
+    increasing sequence of positions that a page is a plain slice of and
+    whose length is the number of matching rows.
+    """
+
+    def __init__(self, dataset: Sequence[List], sort: Optional[str] = None):
+        """Indexes `dataset` in its own order, or sorted on `sort`, a
+        field of `SORT_FIELDS` prefixed with "-" to sort descending.
+        """
+        rows = list(dataset)
+        positions = range(len(rows))
+        if sort is not None:
+            field = sort.lstrip("-")
+            if field not in SORT_FIELDS:
+                raise ValueError("unknown sort field: {}".format(sort))
+            column, convert = SORT_FIELDS[field]
+            positions = sorted(positions,
+                               key=lambda i: convert(rows[i][column]),
+                               reverse=sort.startswith("-"))
+        self.sort = sort
+        self.order = array('I', positions)
+        self.postings: Dict[str, Dict[str, array]] = {
+            field: {} for field in FILTER_FIELDS
+        }
+        self.__names = []
+        self.__selections: Dict[tuple, array] = {}
+        for pos, i in enumerate(self.order):
+            year, gender, ethnicity, name = rows[i][:4]
+            name = name.casefold()
+            self.__names.append(name)
+            for field, value in (("year", year), ("gender", gender),
+                                 ("ethnicity", ethnicity)):
+                self.postings[field].setdefault(value, array('I')).append(pos)
+            prefixes = self.postings["name_prefix"]
+            for depth in range(1, min(len(name), PREFIX_DEPTH) + 1):
+                prefixes.setdefault(name[:depth], array('I')).append(pos)
+
+    def _postings(self, field: str, value) -> Sequence[int]:
+        """Sorted positions of the rows matching a single filter.
+        """
+        if field not in FILTER_FIELDS:
+            raise ValueError("unknown filter field: {}".format(field))
+        empty = array('I')
+        if field == "year":
+            return self.postings[field].get(str(value).strip(), empty)
+        value = str(value)
+        if field != "name_prefix":
+            return self.postings[field].get(value.strip().upper(), empty)
+        prefix = value.casefold()
+        if not prefix:
+            return range(len(self.order))
+        postings = self.postings[field].get(prefix[:PREFIX_DEPTH], empty)
+        if len(prefix) <= PREFIX_DEPTH:
+            return postings
+        names = self.__names
+        return array('I', (pos for pos in postings
+                           if names[pos].startswith(prefix)))
+
+    def select(self, filters: Optional[Dict] = None) -> Sequence[int]:
+        """Sorted positions of the rows matching every filter.
+
+        Single-field selections are posting lists as they are; others are
+        computed once and kept in a bounded cache, so later pages and
+        counts are slices and lengths.
+        """
+        if not filters:
+            return range(len(self.order))
+        key = tuple(sorted((field, str(value))
+                           for field, value in filters.items()))
+        if len(filters) == 1:
+            (field, value), = filters.items()
+            if field != "name_prefix" or len(str(value)) <= PREFIX_DEPTH:
+                return self._postings(field, value)
+        selection = self.__selections.get(key)
+        if selection is None:
+            lists = [self._postings(field, value)
+                     for field, value in filters.items()]
+            selection = lists[0] if len(lists) == 1 else intersect(lists)
+            if len(self.__selections) >= SELECTION_CACHE_SIZE:
+                del self.__selections[next(iter(self.__selections))]
+            self.__selections[key] = selection
+        return selection
+
+    def rows(self, dataset: Sequence[List], selection: Sequence[int],
+             start: int, end: int) -> List[List]:
+        """Rows of `dataset` for positions `start` to `end` of a selection.
+        """
+        return [dataset[self.order[pos]] for pos in selection[start:end]]
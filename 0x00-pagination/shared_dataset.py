@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Dataset shared zero-copy between pre-forked worker processes.
+
+The master parses the CSV once and publishes the packed columnar dataset
+in a shared memory block, e.g. from a gunicorn `on_starting` hook:
+    publisher = SharedDatasetPublisher()
+    publisher.publish(ColumnarDataset.from_csv(Server.DATA_FILE))
+and workers attach to it by the publisher's name:
+    server = Server.attach_shared(publisher.name)
+Publishing again swaps the workers over to the new snapshot.
+"""
+import atexit
+import struct
+import threading
+import time
+import weakref
+from collections.abc import Sequence
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional, Tuple, Union
+
+from columnar_dataset import ColumnarDataset
+
+
+# sequence number (odd while being written), generation, snapshot name
+CONTROL = struct.Struct("=QQ64s")
+SEQUENCE = struct.Struct("=Q")
+_ATTACH_LOCK = threading.Lock()
+_ATTACHED = weakref.WeakSet()
+
+
+def attach_block(name: str) -> shared_memory.SharedMemory:
+    """Attaches to an existing shared memory block without registering it
+    with this process's resource tracker, which would unlink it on exit.
+    """
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        pass
+    # Python < 3.13 always registers attached blocks; unregistering them
+    # afterwards would also drop the creator's registration when the
+    # tracker is inherited through fork, so skip registering instead
+    with _ATTACH_LOCK:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name)
+        finally:
+            resource_tracker.register = register
+
+
+@atexit.register
+def _detach_all() -> None:
+    """Releases the snapshots still attached before the interpreter tears
+    down the shared memory blocks their views point into.
+    """
+    for dataset in list(_ATTACHED):
+        dataset.close()
+
+
+class SharedDatasetPublisher:
+    """Master side: owns the control block and the published snapshots.
+    """
+
+    def __init__(self, name: Optional[str] = None):
+        """Creates the control block, named `name` or a random name.
+        """
+        self.control = shared_memory.SharedMemory(
+            name, create=True, size=CONTROL.size)
+        self.name = self.control.name
+        self.generation = 0
+        self.snapshot: Optional[shared_memory.SharedMemory] = None
+        CONTROL.pack_into(self.control.buf, 0, 0, 0, b"")
+
+    def publish(self, dataset: ColumnarDataset) -> int:
+        """Copies a dataset into a new snapshot block, points the control
+        block at it and unlinks the previous snapshot.
+
+        Returns the new generation number.
+        """
+        packed = dataset.to_bytes()
+        snapshot = shared_memory.SharedMemory(create=True, size=len(packed))
+        snapshot.buf[:len(packed)] = packed
+        self.generation += 1
+        sequence = SEQUENCE.unpack_from(self.control.buf)[0]
+        SEQUENCE.pack_into(self.control.buf, 0, sequence + 1)
+        CONTROL.pack_into(self.control.buf, 0, sequence + 1, self.generation,
+                          snapshot.name.encode("utf-8"))
+        SEQUENCE.pack_into(self.control.buf, 0, sequence + 2)
+        previous, self.snapshot = self.snapshot, snapshot
+        if previous is not None:
+            previous.close()
+            previous.unlink()
+        return self.generation
+
+    def close(self) -> None:
+        """Unlinks the control block and the current snapshot.
+        """
+        for block in (self.snapshot, self.control):
+            if block is not None:
+                block.close()
+                block.unlink()
+        self.snapshot = None
+
+
+class SharedDataset(Sequence):
+    """Worker side: list-like view of the latest published snapshot.
+
+    Every access checks the generation in the control block and attaches
+    to the new snapshot when the master published one. Accesses hold a
+    lock so that no thread reads a snapshot another one is detaching.
+    """
+
+    def __init__(self, name: str):
+        """Attaches to the control block of a publisher.
+        """
+        self.name = name
+        self.control = attach_block(name)
+        self.generation = 0
+        self.__block: Optional[shared_memory.SharedMemory] = None
+        self.__dataset: Optional[ColumnarDataset] = None
+        self.__lock = threading.RLock()
+        _ATTACHED.add(self)
+        self.current()
+
+    def _read_control(self) -> Tuple[int, str]:
+        """Reads a consistent generation and snapshot name.
+        """
+        while True:
+            before, generation, name = CONTROL.unpack_from(self.control.buf)
+            after = SEQUENCE.unpack_from(self.control.buf)[0]
+            if before == after and not before % 2:
+                return generation, name.rstrip(b"\0").decode("utf-8")
+            time.sleep(0)
+
+    def current(self) -> ColumnarDataset:
+        """The dataset of the latest generation, attaching to it if needed.
+        """
+        with self.__lock:
+            generation, name = self._read_control()
+            while generation != self.generation:
+                try:
+                    block = attach_block(name)
+                except FileNotFoundError:
+                    # replaced and unlinked since the control was read
+                    generation, name = self._read_control()
+                    continue
+                self.release()
+                self.__block = block
+                self.__dataset = ColumnarDataset.from_buffer(block.buf)
+                self.generation = generation
+            if self.__dataset is None:
+                raise LookupError(
+                    "no dataset published on {}".format(self.name))
+            return self.__dataset
+
+    def __len__(self) -> int:
+        """Number of rows in the latest snapshot.
+        """
+        with self.__lock:
+            return len(self.current())
+
+    def __getitem__(self, index: Union[int, slice]):
+        """Builds rows from the latest snapshot.
+        """
+        with self.__lock:
+            return self.current()[index]
+
+    def release(self) -> None:
+        """Detaches from the current snapshot.
+        """
+        with self.__lock:
+            if self.__dataset is not None:
+                self.__dataset.release()
+                self.__block.close()
+            self.__dataset = self.__block = None
+            self.generation = 0
+
+    def close(self) -> None:
+        """Detaches from the current snapshot and the control block.
+        """
+        self.release()
+        self.control.close()
+
+    def __del__(self):
+        """Releases the snapshot views before the blocks they point into.
+        """
+        if hasattr(self, "_SharedDataset__lock"):
+            self.close()
@@ -2,65 +2,83 @@
 """Least Frequently Used (LFU) caching module.
 """
 from collections import OrderedDict
-from base_caching import BaseCaching
+from policy_caching import PolicyCaching
 
 
-class LFUCache(BaseCaching):
-    """LFU caching system that stores items up to a limit, 
+class LFUCache(PolicyCaching):
+    """LFU caching system that stores items up to a limit,
     discarding the least frequently used entry if the limit is exceeded.
+    Ties between equally used entries go to the least recently used one.
     """
-    
-    def __init__(self):
+
+    def __init__(self, capacity=None, sizeof=None, default_ttl=None):
         """Initializes the LFU cache."""
-        super().__init__()
-        self.cache_data = OrderedDict()
-        self.keys_freq = []  # Tracks key usage frequency
+        super().__init__(capacity, sizeof, default_ttl)
+        self.keys_freq = {}  # Tracks key usage frequency
+        # Keys of each frequency, least recently used first
+        self.freq_keys = {}
+        self.min_freq = 0
+
+    def __add_key(self, key, freq):
+        """Appends a key to the bucket of its frequency."""
+        self.keys_freq[key] = freq
+        if freq not in self.freq_keys:
+            self.freq_keys[freq] = OrderedDict()
+        self.freq_keys[freq][key] = None
+
+    def __remove_key(self, key):
+        """Unlinks a key from its frequency bucket, returning its frequency."""
+        freq = self.keys_freq.pop(key)
+        bucket = self.freq_keys[freq]
+        del bucket[key]
+        if not bucket:
+            del self.freq_keys[freq]
+            if self.min_freq == freq:
+                self.min_freq = freq + 1
+        return freq
 
     def __reorder_items(self, mru_key):
-        """Reorders items based on frequency and recent use."""
-        max_positions = []
-        mru_freq = 0
-        mru_pos = 0
-        ins_pos = 0
-        for i, key_freq in enumerate(self.keys_freq):
-            if key_freq[0] == mru_key:
-                mru_freq = key_freq[1] + 1
-                mru_pos = i
-                break
-            elif len(max_positions) == 0:
-                max_positions.append(i)
-            elif key_freq[1] < self.keys_freq[max_positions[-1]][1]:
-                max_positions.append(i)
-        max_positions.reverse()
-        for pos in max_positions:
-            if self.keys_freq[pos][1] > mru_freq:
-                break
-            ins_pos = pos
-        self.keys_freq.pop(mru_pos)
-        self.keys_freq.insert(ins_pos, [mru_key, mru_freq])
+        """Moves a key to the next frequency bucket as its most recent key."""
+        self.__add_key(mru_key, self.__remove_key(mru_key) + 1)
+
+    def _insert(self, key):
+        """Starts a new key at frequency 0."""
+        self.__add_key(key, 0)
+        self.min_freq = 0
+
+    def _update(self, key):
+        """Counts a put on a cached key as a use."""
+        self.__reorder_items(key)
+
+    def _hit(self, key):
+        """Counts a read as a use."""
+        self.__reorder_items(key)
+
+    def _forget(self, key):
+        """Drops a key from the frequency buckets."""
+        self.__remove_key(key)
+
+    def _ranked(self):
+        """Yields the keys with their frequency, from the most used."""
+        for freq in sorted(self.freq_keys, reverse=True):
+            for key in reversed(self.freq_keys[freq]):
+                yield key, freq
 
-    def put(self, key, item):
-        """Adds an item to the cache, removes LFU item if limit reached."""
-        if key is None or item is None:
-            return
-        if key not in self.cache_data:
-            if len(self.cache_data) + 1 > BaseCaching.MAX_ITEMS:
-                lfu_key, _ = self.keys_freq.pop()
-                self.cache_data.pop(lfu_key)
-                print("DISCARD:", lfu_key)
-            self.cache_data[key] = item
-            ins_index = len(self.keys_freq)
-            for i, key_freq in enumerate(self.keys_freq):
-                if key_freq[1] == 0:
-                    ins_index = i
-                    break
-            self.keys_freq.insert(ins_index, [key, 0])
-        else:
-            self.cache_data[key] = item
-            self.__reorder_items(key)
+    def _restore(self, key, meta):
+        """Puts a loaded key at the least recent end of its frequency."""
+        freq = meta or 0
+        self.__add_key(key, freq)
+        self.freq_keys[freq].move_to_end(key, last=False)
+        self.min_freq = min(self.freq_keys)
 
-    def get(self, key):
-        """Retrieves an item by key and updates its frequency."""
-        if key is not None and key in self.cache_data:
-            self.__reorder_items(key)
-        return self.cache_data.get(key, None)
+    def _victim(self, exclude):
+        """Picks the least recently used key of the lowest frequency."""
+        if self.min_freq in self.freq_keys:
+            for key in self.freq_keys[self.min_freq]:
+                if key != exclude:
+                    return key
+        for freq in sorted(self.freq_keys):
+            for key in self.freq_keys[freq]:
+                if key != exclude:
+                    return key
+        return None
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Adaptive Replacement Cache (ARC) caching module.
+"""
+from collections import OrderedDict
+from policy_caching import PolicyCaching
+
+
+class ARCCache(PolicyCaching):
+    """ARC caching system balancing recency and frequency.
+
+    Entries seen once live in T1 and entries seen again in T2, both from
+    least to most recently used. Keys evicted from them are remembered in
+    the ghost lists B1 and B2, and a hit on a ghost moves the target size
+    `p` of T1 towards the list that would have kept it, so a one-off scan
+    only churns T1 and leaves the frequently used entries of T2 alone.
+    """
+
+    def __init__(self, capacity=None, sizeof=None, default_ttl=None):
+        """Initializes the ARC cache."""
+        super().__init__(capacity, sizeof, default_ttl)
+        self.t1 = OrderedDict()  # Resident, seen once
+        self.t2 = OrderedDict()  # Resident, seen at least twice
+        self.b1 = OrderedDict()  # Ghosts evicted from t1
+        self.b2 = OrderedDict()  # Ghosts evicted from t2
+        self.p = 0  # Target size of t1
+        self.__drop_t1 = False
+
+    def _admit(self, key):
+        """Adapts `p` on a ghost hit, or trims the ghost lists for a key
+        never seen before.
+        """
+        slots = self.slots
+        if key in self.b1:
+            self.p = min(slots, self.p + max(len(self.b2) // len(self.b1), 1))
+        elif key in self.b2:
+            self.p = max(0, self.p - max(len(self.b1) // len(self.b2), 1))
+        elif len(self.t1) + len(self.b1) >= slots:
+            if self.b1:
+                self.b1.popitem(last=False)
+            else:
+                # T1 fills the cache: its LRU entry leaves no ghost
+                self.__drop_t1 = True
+        elif (len(self.t1) + len(self.t2) + len(self.b1) + len(self.b2)
+              >= 2 * slots and self.b2):
+            self.b2.popitem(last=False)
+
+    def _insert(self, key):
+        """Puts a new key in T1, or in T2 if it was a ghost."""
+        self.__drop_t1 = False
+        if key in self.b1 or key in self.b2:
+            self.b1.pop(key, None)
+            self.b2.pop(key, None)
+            self.t2[key] = None
+        else:
+            self.t1[key] = None
+
+    def _hit(self, key):
+        """Moves a used entry to the most recent end of T2."""
+        self.t1.pop(key, None)
+        self.t2.pop(key, None)
+        self.t2[key] = None
+
+    def _update(self, key):
+        """Counts a put on a cached key as a use."""
+        self._hit(key)
+
+    def _forget(self, key):
+        """Drops a key from the resident lists."""
+        self.t1.pop(key, None)
+        self.t2.pop(key, None)
+
+    def _ranked(self):
+        """Yields the keys of T2 then T1, from the most recent, with the
+        list holding them.
+        """
+        for key in reversed(self.t2):
+            yield key, 2
+        for key in reversed(self.t1):
+            yield key, 1
+
+    def _restore(self, key, meta):
+        """Puts a loaded key at the least recent end of its list."""
+        resident = self.t2 if meta == 2 else self.t1
+        resident[key] = None
+        resident.move_to_end(key, last=False)
+
+    def _victim(self, exclude):
+        """Picks the LRU entry of T1 if it's over its target size, else
+        the LRU entry of T2, and remembers it as a ghost.
+        """
+        t1 = next((key for key in self.t1 if key != exclude), None)
+        t2 = next((key for key in self.t2 if key != exclude), None)
+        if t1 is not None and self.__drop_t1:
+            self.__drop_t1 = False
+            return t1
+        if t1 is not None and (
+                t2 is None or len(self.t1) > self.p
+                or (exclude in self.b2 and len(self.t1) == self.p)):
+            self.b1[t1] = None
+            return t1
+        if t2 is not None:
+            self.b2[t2] = None
+        return t2
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""2Q caching module.
+"""
+from collections import OrderedDict
+from policy_caching import PolicyCaching
+
+
+class TwoQueueCache(PolicyCaching):
+    """2Q caching system keeping entries used only once away from the
+    frequently used ones.
+
+    New keys go through the FIFO queue A1in. Keys evicted from it are
+    remembered in the ghost queue A1out, and only a key put again while
+    it's there enters the main LRU queue Am, so a scan passes through
+    A1in without flushing Am.
+    """
+
+    KIN = 0.25  # Share of the entries A1in holds before it evicts
+    KOUT = 0.5  # Ghosts remembered in A1out, relative to the entries
+
+    def __init__(self, capacity=None, sizeof=None, default_ttl=None):
+        """Initializes the 2Q cache."""
+        super().__init__(capacity, sizeof, default_ttl)
+        self.a1in = OrderedDict()  # Resident, seen once, oldest first
+        self.a1out = OrderedDict()  # Ghosts evicted from a1in
+        self.am = OrderedDict()  # Resident, reused, least recent first
+
+    def _insert(self, key):
+        """Puts a new key in A1in, or in Am if it was a ghost."""
+        if key in self.a1out:
+            del self.a1out[key]
+            self.am[key] = None
+        else:
+            self.a1in[key] = None
+
+    def _hit(self, key):
+        """Moves a used entry of Am to its most recent end; entries of
+        A1in keep their place.
+        """
+        if key in self.am:
+            self.am.move_to_end(key)
+
+    def _update(self, key):
+        """Counts a put on a cached key as a use."""
+        self._hit(key)
+
+    def _forget(self, key):
+        """Drops a key from the resident queues."""
+        self.a1in.pop(key, None)
+        self.am.pop(key, None)
+
+    def _ranked(self):
+        """Yields the keys of Am then A1in, from the most recent, with
+        the queue holding them.
+        """
+        for key in reversed(self.am):
+            yield key, "am"
+        for key in reversed(self.a1in):
+            yield key, "a1in"
+
+    def _restore(self, key, meta):
+        """Puts a loaded key at the oldest end of its queue."""
+        queue = self.am if meta == "am" else self.a1in
+        queue[key] = None
+        queue.move_to_end(key, last=False)
+
+    def _victim(self, exclude):
+        """Picks the oldest entry of A1in if it's over its share,
+        remembering it in A1out, else the LRU entry of Am.
+        """
+        slots = self.slots
+        a1in = next((key for key in self.a1in if key != exclude), None)
+        am = next((key for key in self.am if key != exclude), None)
+        if a1in is not None and (am is None
+                                 or len(self.a1in) > self.KIN * slots):
+            self.a1out[a1in] = None
+            while len(self.a1out) > max(int(self.KOUT * slots), 1):
+                self.a1out.popitem(last=False)
+            return a1in
+        return am
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Window TinyLFU (W-TinyLFU) caching module.
+"""
+from collections import OrderedDict
+from typing import List
+from policy_caching import PolicyCaching
+
+
+class FrequencySketch:
+    """Count-min sketch of how often keys were seen recently.
+
+    Each key has one 4-bit counter in each of `DEPTH` rows, and its
+    estimate is the smallest of them. All counters are halved once the
+    sketch has counted 10 times as many keys as it is wide, so that old
+    popularity fades.
+    """
+
+    # Odd multipliers spreading a key's hash over each row
+    SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9,
+             0xD6E8FEB86659FD93)
+    DEPTH = len(SEEDS)
+    MAX_COUNT = 15
+
+    def __init__(self, slots: int):
+        """Sizes the sketch for a cache of `slots` entries."""
+        width = 16
+        while width < slots:
+            width <<= 1
+        self.mask = width - 1
+        self.rows = [bytearray(width) for _ in range(self.DEPTH)]
+        self.samples = 0
+        self.sample_size = 10 * width
+
+    def __indexes(self, key) -> List[int]:
+        """Returns the counter of a key in each row."""
+        h = hash(key)
+        mask = self.mask
+        return [((h * seed) >> 32) & mask for seed in self.SEEDS]
+
+    def add(self, key):
+        """Counts one occurrence of a key."""
+        for row, index in zip(self.rows, self.__indexes(key)):
+            if row[index] < self.MAX_COUNT:
+                row[index] += 1
+        self.samples += 1
+        if self.samples >= self.sample_size:
+            self.rows = [bytearray(count >> 1 for count in row)
+                         for row in self.rows]
+            self.samples //= 2
+
+    def estimate(self, key) -> int:
+        """Returns how often a key was seen recently."""
+        rows = self.rows
+        return min([rows[depth][index]
+                    for depth, index in enumerate(self.__indexes(key))])
+
+
+class TinyLFUCache(PolicyCaching):
+    """W-TinyLFU caching system admitting new entries into its main area
+    only if they are used more often than the entries they would evict.
+
+    New keys enter a small LRU window. Entries leaving the window compete
+    with the victim of the main area, a segmented LRU whose probation
+    segment holds entries used once there and whose protected segment
+    holds the ones used again, and the one the frequency sketch has seen
+    less often is evicted.
+    """
+
+    WINDOW = 0.01  # Share of the entries held by the window
+    PROTECTED = 0.8  # Share of the main area held by the protected segment
+    SIZED_SLOTS = 4096  # Entries the sketch is sized for with sizeof
+
+    def __init__(self, capacity=None, sizeof=None, default_ttl=None):
+        """Initializes the W-TinyLFU cache."""
+        super().__init__(capacity, sizeof, default_ttl)
+        self.sketch = FrequencySketch(self.capacity if sizeof is None
+                                      else self.SIZED_SLOTS)
+        self.window = OrderedDict()  # New entries, least recent first
+        self.probation = OrderedDict()  # Main entries used once there
+        self.protected = OrderedDict()  # Main entries used again
+
+    def __window_size(self) -> int:
+        """Entries the window holds before passing them to the main area."""
+        return max(int(self.WINDOW * self.slots), 1)
+
+    def get(self, key):
+        """Retrieves an item by key, counting the request in the sketch
+        whether it hits or not.
+        """
+        if key is not None:
+            self.sketch.add(key)
+        return super().get(key)
+
+    def _admit(self, key):
+        """Counts the put of a new key in the sketch."""
+        self.sketch.add(key)
+
+    def _insert(self, key):
+        """Puts a new key in the window, passing its oldest entry to the
+        probation segment if the window is full.
+        """
+        self.window[key] = None
+        if len(self.window) > self.__window_size():
+            oldest, _ = self.window.popitem(last=False)
+            self.probation[oldest] = None
+
+    def _hit(self, key):
+        """Refreshes a used entry, promoting it to the protected segment if
+        it was on probation.
+        """
+        if key in self.window:
+            self.window.move_to_end(key)
+        elif key in self.protected:
+            self.protected.move_to_end(key)
+        elif key in self.probation:
+            del self.probation[key]
+            self.protected[key] = None
+            limit = max(int(self.PROTECTED
+                            * (self.slots - self.__window_size())), 1)
+            if len(self.protected) > limit:
+                demoted, _ = self.protected.popitem(last=False)
+                self.probation[demoted] = None
+
+    def _update(self, key):
+        """Counts a put on a cached key as a use."""
+        self.sketch.add(key)
+        self._hit(key)
+
+    def _forget(self, key):
+        """Drops a key from its segment."""
+        self.window.pop(key, None)
+        self.probation.pop(key, None)
+        self.protected.pop(key, None)
+
+    def _ranked(self):
+        """Yields the keys of the protected, probation and window
+        segments, from the most recent, with their segment and estimated
+        frequency.
+        """
+        for name in ("protected", "probation", "window"):
+            for key in reversed(getattr(self, name)):
+                yield key, (name, self.sketch.estimate(key))
+
+    def _restore(self, key, meta):
+        """Puts a loaded key at the least recent end of its segment,
+        counting its estimated frequency back into the sketch.
+        """
+        name, estimate = meta or ("probation", 0)
+        segment = getattr(self, name)
+        segment[key] = None
+        segment.move_to_end(key, last=False)
+        for _ in range(estimate):
+            self.sketch.add(key)
+
+    def _victim(self, exclude):
+        """Evicts the oldest window entry if the window is full and it was
+        seen less often than the victim of the main area, else admits it
+        to probation and evicts that victim.
+        """
+        candidate = None
+        if len(self.window) >= self.__window_size():
+            candidate = next(
+                (key for key in self.window if key != exclude), None)
+        victim = next((key for key in self.probation if key != exclude),
+                      None)
+        if victim is None:
+            victim = next((key for key in self.protected if key != exclude),
+                          None)
+        if candidate is None:
+            if victim is None:
+                return next(
+                    (key for key in self.window if key != exclude), None)
+            return victim
+        if victim is None or (self.sketch.estimate(candidate)
+                              <= self.sketch.estimate(victim)):
+            return candidate
+        del self.window[candidate]
+        self.probation[candidate] = None
+        return victim
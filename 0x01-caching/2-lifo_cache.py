@@ -1,30 +1,29 @@
 #!/usr/bin/env python3
 """Last-In First-Out (LIFO) caching module.
 """
-from collections import OrderedDict
-from base_caching import BaseCaching
+from policy_caching import PolicyCaching
 
 
-class LIFOCache(BaseCaching):
-    """LIFO caching system that stores items up to a set limit, 
+class LIFOCache(PolicyCaching):
+    """LIFO caching system that stores items up to a set limit,
     discarding the most recent entry when the limit is exceeded.
     """
-    
-    def __init__(self):
-        """Initializes the LIFO cache."""
-        super().__init__()
-        self.cache_data = OrderedDict()
 
-    def put(self, key, item):
-        """Adds an item to the cache; removes most recent if limit is reached."""
-        if key is None or item is None:
-            return
-        if key not in self.cache_data and len(self.cache_data) >= BaseCaching.MAX_ITEMS:
-            last_key, _ = self.cache_data.popitem(last=True)
-            print("DISCARD:", last_key)
-        self.cache_data[key] = item
+    def _update(self, key):
+        """Makes an overwritten entry the most recent one."""
         self.cache_data.move_to_end(key)
 
-    def get(self, key):
-        """Retrieves an item by key."""
-        return self.cache_data.get(key, None)
+    def _ranked(self):
+        """Yields the keys from the oldest, evicted last."""
+        for key in self.cache_data:
+            yield key, None
+
+    def _restore(self, key, meta):
+        """Leaves a loaded key at the recent end, evicted first."""
+
+    def _victim(self, exclude):
+        """Picks the most recent entry."""
+        for key in reversed(self.cache_data):
+            if key != exclude:
+                return key
+        return None
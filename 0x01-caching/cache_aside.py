@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Cache-aside layer and memoization decorator over the caching policies.
+"""
+import asyncio
+import functools
+import inspect
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Union
+
+from cache_policies import get_policy
+from policy_caching import PolicyCaching
+from thread_safe_caching import synchronized
+
+
+_KWARGS = object()  # Separates positional from keyword arguments in keys
+
+
+def make_key(*args: Any, **kwargs: Any) -> Hashable:
+    """Builds a cache key from call arguments, which must be hashable."""
+    if not kwargs:
+        return args
+    return args + (_KWARGS,) + tuple(sorted(kwargs.items()))
+
+
+class _Flight:
+    """Load in progress, awaited by the threads missing the same key."""
+
+    def __init__(self):
+        """Initializes a pending load."""
+        self.done = threading.Event()
+        self.item = None
+        self.error = None
+
+
+class CacheAside:
+    """Reads through a cache, loading the items it misses and putting
+    them back, with at most one load in flight per key: concurrent
+    misses of a key wait for the first one's result instead of loading
+    it again.
+
+    The cache must be thread-safe if used from several threads, e.g. a
+    `synchronized(LFUCache)`. A None item can't be cached, so it's loaded
+    again on each call. If the coroutine loading a key is cancelled, the
+    ones waiting for it load the key again rather than being cancelled.
+    """
+
+    def __init__(self, cache, ttl: Optional[float] = None):
+        """Wraps a cache, putting loaded items with `ttl` if given."""
+        self.cache = cache
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.flights: Dict[Hashable, _Flight] = {}
+        self.async_flights: Dict[Hashable, asyncio.Future] = {}
+
+    def __put(self, key, item):
+        """Puts a loaded item in the cache."""
+        if self.ttl is None:
+            self.cache.put(key, item)
+        else:
+            self.cache.put(key, item, self.ttl)
+
+    def __peek(self, key):
+        """Returns the cached item of a key without recording an access,
+        if the cache can.
+        """
+        peek = getattr(self.cache, "peek", None)
+        return self.cache.get(key) if peek is None else peek(key)
+
+    def get(self, key: Hashable, loader: Callable[[], Any]):
+        """Returns the item of a key, calling `loader()` on a miss."""
+        item = self.cache.get(key)
+        if item is not None:
+            return item
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                # A flight may have put the item since the first check;
+                # peeked so that the miss isn't counted twice
+                item = self.__peek(key)
+                if item is not None:
+                    return item
+                flight = self.flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.item
+        try:
+            flight.item = loader()
+            if flight.item is not None:
+                self.__put(key, flight.item)
+            return flight.item
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+
+    async def aget(self, key: Hashable, loader: Callable[[], Awaitable]):
+        """Returns the item of a key, awaiting `loader()` on a miss.
+
+        Single-flight applies to the coroutines of one event loop.
+        """
+        item = self.cache.get(key)
+        if item is not None:
+            return item
+        future = self.async_flights.get(key)
+        while future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Only the leader was cancelled if its future was and
+                # this task isn't being cancelled too (Python 3.11+)
+                task = asyncio.current_task()
+                if (not future.cancelled()
+                        or getattr(task, "cancelling", lambda: 0)()):
+                    raise
+            future = self.async_flights.get(key)
+        future = asyncio.get_running_loop().create_future()
+        self.async_flights[key] = future
+        try:
+            item = await loader()
+            if item is not None:
+                self.__put(key, item)
+            future.set_result(item)
+            return item
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            # Retrieved here so that a load nobody waited for isn't
+            # reported as never retrieved
+            future.exception()
+            raise
+        finally:
+            del self.async_flights[key]
+
+    def invalidate(self, key: Hashable):
+        """Drops the cached item of a key."""
+        self.cache.pop(key)
+
+
+def cached(policy: Union[str, type] = "lfu", capacity: Optional[int] = None,
+           ttl: Optional[float] = None,
+           key: Callable[..., Hashable] = make_key, **kwargs: Any):
+    """Memoizes a function or coroutine function in a synchronized cache
+    of `policy`, a class or registered name, keyed by `key(*args,
+    **kwargs)` of each call:
+
+        @cached(policy=LFUCache, capacity=256, ttl=60)
+        def get_hyper(self, page, page_size): ...
+
+    Other keyword arguments go to the cache. The wrapper exposes its
+    CacheAside as `cache_aside` and `invalidate(*args, **kwargs)`.
+    """
+    if isinstance(policy, str):
+        policy = get_policy(policy)
+    if not issubclass(policy, PolicyCaching):
+        raise ValueError("not a bounded cache policy: {}".format(
+            policy.__name__))
+
+    def decorator(func):
+        cache = synchronized(policy)(capacity=capacity, **kwargs)
+        aside = CacheAside(cache, ttl)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kw):
+                return await aside.aget(key(*args, **kw),
+                                        lambda: func(*args, **kw))
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kw):
+                return aside.get(key(*args, **kw),
+                                 lambda: func(*args, **kw))
+
+        wrapper.cache_aside = aside
+        wrapper.invalidate = lambda *args, **kw: aside.invalidate(
+            key(*args, **kw))
+        return wrapper
+
+    return decorator
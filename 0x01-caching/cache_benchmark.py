@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Benchmarks for the caching policies.
+
+Run from this directory, naming the benchmarks to run (all by default):
+    python3 cache_benchmark.py lfu_scaling replay
+"""
+import gc
+import random
+import sys
+import threading
+import time
+from typing import Callable, Dict, List
+
+
+def load_policy(module: str, name: str):
+    """Imports a cache class from one of the numbered modules."""
+    return getattr(__import__(module), name)
+
+
+def bench_lfu_scaling(ops: int = 200000) -> None:
+    """Operations per second of LFUCache from 4 to 1M items, with gets and
+    puts spread over twice as many keys as the cache holds.
+    """
+    LFUCache = load_policy('100-lfu_cache', 'LFUCache')
+    print("LFUCache, {} ops, 50% gets (ops/s)".format(ops))
+    for capacity in (4, 64, 1024, 16384, 262144, 1048576):
+        cache = LFUCache(capacity)
+        rng = random.Random(0)
+        keys = [rng.randrange(2 * capacity) for _ in range(ops)]
+        writes = [rng.random() < 0.5 for _ in range(ops)]
+        for key in range(capacity):
+            cache.put(key, key)
+        gc.disable()
+        start = time.perf_counter()
+        for key, write in zip(keys, writes):
+            if write:
+                cache.put(key, key)
+            else:
+                cache.get(key)
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        print("  {:>8} items {:12.0f}".format(capacity, ops / elapsed))
+
+
+def run_threads(cache, threads: int, ops: int, keyspace: int) -> float:
+    """Runs `ops` gets and puts (one put per 4 ops) on `cache` from each
+    of `threads` threads at once, returning the total ops per second.
+    """
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(seed):
+        rng = random.Random(seed)
+        keys = [rng.randrange(keyspace) for _ in range(ops)]
+        barrier.wait()
+        for i, key in enumerate(keys):
+            if i % 4 == 0:
+                cache.put(key, key)
+            else:
+                cache.get(key)
+
+    workers = [threading.Thread(target=worker, args=(seed,))
+               for seed in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return threads * ops / (time.perf_counter() - start)
+
+
+def bench_threads(ops: int = 50000, capacity: int = 4096) -> None:
+    """Aggregate throughput of a single-lock LRUCache against a 16-way
+    lock-striped one, from 1 to 8 threads.
+    """
+    from thread_safe_caching import ShardedCache, synchronized
+    LRUCache = load_policy('3-lru_cache', 'LRUCache')
+    print("LRUCache, capacity {}, 25% puts (ops/s)".format(capacity))
+    for threads in (1, 2, 4, 8):
+        locked = run_threads(synchronized(LRUCache)(capacity),
+                             threads, ops, 2 * capacity)
+        sharded = run_threads(ShardedCache(LRUCache, 16, capacity),
+                              threads, ops, 2 * capacity)
+        print("  {} threads: one lock {:10.0f} | 16 shards {:10.0f}"
+              .format(threads, locked, sharded))
+
+
+def bench_replay(length: int = 50000, universe: int = 5000) -> None:
+    """Hit ratio, latency and memory of every bounded policy replaying the
+    synthetic traces of cache_replay at two capacities.
+    """
+    from cache_policies import POLICIES
+    from cache_replay import TRACES, report
+    report(TRACES, list(POLICIES),
+           (universe // 50, universe // 5), length, universe)
+
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {
+    "lfu_scaling": bench_lfu_scaling,
+    "threads": bench_threads,
+    "replay": bench_replay,
+}
+
+
+def main(names: List[str]) -> None:
+    """Runs the named benchmarks, or all of them."""
+    for name in names or BENCHMARKS:
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Counters, latency histograms and eviction listeners of the caches.
+"""
+from array import array
+from typing import Dict, Iterable, List
+
+
+# Reasons passed to the listeners of the entries leaving a cache
+EVICTED = "evicted"
+EXPIRED = "expired"
+
+COUNTERS = ("hits", "misses", "inserts", "updates", "evictions",
+            "expirations")
+
+
+def print_discard(key, item, reason: str) -> None:
+    """Listener printing the evicted keys like the original caches did,
+    e.g. `cache.add_listener(print_discard)`.
+    """
+    if reason == EVICTED:
+        print("DISCARD:", key)
+
+
+class LatencyHistogram:
+    """Histogram of durations in nanoseconds, in power of two buckets,
+    so that recording is O(1) and percentiles are within a factor of 2.
+    """
+
+    BUCKETS = 48  # Up to 2**47 ns, about 39 hours
+
+    def __init__(self):
+        """Initializes an empty histogram."""
+        self.counts = array('Q', bytes(8 * self.BUCKETS))
+        self.count = 0
+        self.total = 0
+
+    def record(self, duration_ns: int) -> None:
+        """Counts one duration."""
+        self.counts[min(duration_ns.bit_length(), self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += duration_ns
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Adds the durations counted by another histogram."""
+        for bucket, count in enumerate(other.counts):
+            self.counts[bucket] += count
+        self.count += other.count
+        self.total += other.total
+
+    def percentile(self, q: float) -> float:
+        """Upper bound in microseconds of the `q`th percentile."""
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return (1 << bucket) / 1e3
+        return 0.0
+
+    def snapshot(self) -> Dict:
+        """Returns the count, mean, p50 and p99 in microseconds."""
+        return {
+            "count": self.count,
+            "mean_us": self.total / self.count / 1e3 if self.count else 0.0,
+            "p50_us": self.percentile(50),
+            "p99_us": self.percentile(99),
+        }
+
+
+class CacheStats:
+    """Operation counters of a cache, and latency histograms of one in
+    every `sample_every` gets and puts (none if 0).
+    """
+
+    def __init__(self, sample_every: int = 0):
+        """Initializes the counters to 0."""
+        for name in COUNTERS:
+            setattr(self, name, 0)
+        self.sample_every = sample_every
+        self.countdown = sample_every
+        self.latencies = {"get": LatencyHistogram(),
+                          "put": LatencyHistogram()}
+
+    def sample(self) -> bool:
+        """Tells whether to time the current operation."""
+        self.countdown -= 1
+        if self.countdown > 0:
+            return False
+        self.countdown = self.sample_every
+        return True
+
+    def snapshot(self) -> Dict:
+        """Returns the counters, hit ratio and latencies as a dict."""
+        stats = {name: getattr(self, name) for name in COUNTERS}
+        lookups = self.hits + self.misses
+        stats["hit_ratio"] = self.hits / lookups if lookups else 0.0
+        if self.sample_every:
+            stats["latency"] = {op: histogram.snapshot()
+                                for op, histogram in self.latencies.items()}
+        return stats
+
+    @classmethod
+    def merged(cls, stats: Iterable["CacheStats"]) -> "CacheStats":
+        """Returns the sum of several caches' stats, e.g. of shards."""
+        total = None
+        for part in stats:
+            if total is None:
+                total = cls(part.sample_every)
+            for name in COUNTERS:
+                setattr(total, name, getattr(total, name)
+                        + getattr(part, name))
+            for op, histogram in part.latencies.items():
+                total.latencies[op].merge(histogram)
+        return total if total is not None else cls()
+
+
+def format_metrics(metrics: Dict, prefix: str = "cache") -> List[str]:
+    """Formats the metrics of a cache as Prometheus text exposition
+    lines, e.g. `cache_hits 42`.
+    """
+    lines = []
+    for name, value in metrics.items():
+        if isinstance(value, dict):
+            for op, values in value.items():
+                for field, number in values.items():
+                    lines.append('{}_{}_{}{{op="{}"}} {}'.format(
+                        prefix, name, field, op, number))
+        else:
+            lines.append("{}_{} {}".format(prefix, name, value))
+    return lines
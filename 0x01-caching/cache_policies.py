@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Registry of the caching policies, to pick one by name from
+configuration.
+"""
+from typing import Any, Dict, Tuple
+
+
+# Policy name: (module, class) of the bounded policies, which all take
+# capacity, sizeof and default_ttl (BasicCache is unbounded, so absent)
+POLICIES: Dict[str, Tuple[str, str]] = {
+    "fifo": ("1-fifo_cache", "FIFOCache"),
+    "lifo": ("2-lifo_cache", "LIFOCache"),
+    "lru": ("3-lru_cache", "LRUCache"),
+    "mru": ("4-mru_cache", "MRUCache"),
+    "lfu": ("100-lfu_cache", "LFUCache"),
+    "arc": ("101-arc_cache", "ARCCache"),
+    "2q": ("102-two_queue_cache", "TwoQueueCache"),
+    "tinylfu": ("103-tinylfu_cache", "TinyLFUCache"),
+}
+
+
+def get_policy(name: str) -> type:
+    """Returns the cache class registered under a name."""
+    if name not in POLICIES:
+        raise ValueError("unknown cache policy: {}".format(name))
+    module, cls = POLICIES[name]
+    return getattr(__import__(module), cls)
+
+
+def make_cache(name: str, **kwargs: Any):
+    """Creates a cache of the policy registered under a name, e.g.
+    `make_cache("arc", capacity=1024)`.
+    """
+    return get_policy(name)(**kwargs)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Replays key access traces against the caching policies, reporting hit
+ratio, throughput, latency percentiles and peak memory.
+
+Run from this directory with synthetic traces or trace files (one key per
+line, in the first column):
+    python3 cache_replay.py --trace zipf --trace scan --capacity 1000
+    python3 cache_replay.py --trace requests.log --policy lru --policy arc
+"""
+import argparse
+import bisect
+import gc
+import itertools
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from cache_policies import POLICIES, make_cache
+
+
+def zipf_trace(length: int, universe: int, seed: int = 0,
+               alpha: float = 0.99) -> List[int]:
+    """Keys drawn from `universe` keys with Zipf popularity, key 0 being
+    the most popular.
+    """
+    rng = random.Random(seed)
+    weights = itertools.accumulate(
+        1 / (rank + 1) ** alpha for rank in range(universe))
+    cumulative = list(weights)
+    total = cumulative[-1]
+    return [bisect.bisect(cumulative, rng.random() * total)
+            for _ in range(length)]
+
+
+def scan_trace(length: int, universe: int, seed: int = 0) -> List[int]:
+    """Keys read once each, in order."""
+    return list(range(length))
+
+
+def loop_trace(length: int, universe: int, seed: int = 0) -> List[int]:
+    """The `universe` keys read in order, over and over."""
+    return [i % universe for i in range(length)]
+
+
+def mixed_trace(length: int, universe: int, seed: int = 0) -> List[int]:
+    """Zipf accesses interrupted every 10% of the trace by a scan of new
+    keys taking a fifth of it, e.g. a batch job.
+    """
+    burst = max(length // 10, 1)
+    scan = burst // 5
+    hot = zipf_trace(length, universe, seed)
+    trace = []
+    for start in range(0, length, burst):
+        trace.extend(hot[start:start + burst - scan])
+        trace.extend(range(universe + start, universe + start + scan))
+    return trace[:length]
+
+
+TRACES: Dict[str, Callable[..., List[int]]] = {
+    "zipf": zipf_trace,
+    "scan": scan_trace,
+    "loop": loop_trace,
+    "mixed": mixed_trace,
+}
+
+
+def read_trace(path: str) -> List[str]:
+    """Reads the keys of a trace file, skipping blank and # lines."""
+    with open(path) as f:
+        return [line.split()[0] for line in f
+                if line.strip() and not line.startswith("#")]
+
+
+def load_trace(source: str, length: int, universe: int,
+               seed: int = 0) -> List:
+    """Generates the named synthetic trace, or reads a trace file."""
+    if source in TRACES:
+        return TRACES[source](length, universe, seed)
+    return read_trace(source)
+
+
+def _access(cache, key) -> bool:
+    """Reads a key through the cache, putting it on a miss; returns
+    whether it hit.
+    """
+    if cache.get(key) is not None:
+        return True
+    cache.put(key, key)
+    return False
+
+
+def replay(policy: str, capacity: int, trace: Sequence) -> Dict:
+    """Replays a trace against a new cache of a policy, returning its
+    hit ratio, ops per second, p50 and p99 latency in microseconds and
+    peak traced memory in KiB.
+
+    Latency and memory are measured in separate runs, as tracemalloc
+    slows down every allocation.
+    """
+    cache = make_cache(policy, capacity=capacity)
+    latencies = []
+    hits = 0
+    clock = time.perf_counter_ns
+    gc.disable()
+    try:
+        for key in trace:
+            start = clock()
+            hits += _access(cache, key)
+            latencies.append(clock() - start)
+    finally:
+        gc.enable()
+    del cache
+    tracemalloc.start()
+    try:
+        cache = make_cache(policy, capacity=capacity)
+        for key in trace:
+            _access(cache, key)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    latencies.sort()
+    count = max(len(latencies), 1)
+    return {
+        "hit_ratio": hits / count,
+        "ops_per_s": count / max(sum(latencies), 1) * 1e9,
+        "p50_us": latencies[(count - 1) // 2] / 1e3 if latencies else 0.0,
+        "p99_us": latencies[(count - 1) * 99 // 100] / 1e3
+        if latencies else 0.0,
+        "peak_kib": peak / 1024,
+    }
+
+
+def report(sources: Iterable[str], policies: Iterable[str],
+           capacities: Iterable[int], length: int = 100000,
+           universe: int = 10000, seed: int = 0,
+           out=sys.stdout) -> None:
+    """Prints the replay results of every trace, capacity and policy."""
+    policies = list(policies)
+    capacities = list(capacities)
+    for source in sources:
+        trace = load_trace(source, length, universe, seed)
+        print("{} ({} ops)".format(source, len(trace)), file=out)
+        print("  {:>8} {:<8} {:>6} {:>10} {:>8} {:>8} {:>10}".format(
+            "capacity", "policy", "hit%", "ops/s", "p50 us", "p99 us",
+            "peak KiB"), file=out)
+        for capacity in capacities:
+            for policy in policies:
+                result = replay(policy, capacity, trace)
+                print("  {:>8} {:<8} {:6.2f} {:10.0f} {:8.2f} {:8.2f} "
+                      "{:10.1f}".format(
+                          capacity, policy, 100 * result["hit_ratio"],
+                          result["ops_per_s"], result["p50_us"],
+                          result["p99_us"], result["peak_kib"]), file=out)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Parses the command line and prints the report."""
+    bounded = list(POLICIES)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trace", action="append",
+                        help="one of {} or a trace file (all generators "
+                        "by default)".format(", ".join(TRACES)))
+    parser.add_argument("--policy", action="append", choices=bounded,
+                        help="policy to replay (all by default)")
+    parser.add_argument("--capacity", action="append", type=int,
+                        help="cache capacity (100 and 1000 by default)")
+    parser.add_argument("--length", type=int, default=100000,
+                        help="length of the synthetic traces")
+    parser.add_argument("--universe", type=int, default=10000,
+                        help="distinct keys of the synthetic traces")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    report(args.trace or list(TRACES), args.policy or bounded,
+           args.capacity or [100, 1000], args.length, args.universe,
+           args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Snapshots of the policy caches, to restart them warm.
+
+A snapshot is a header followed by one pickled record per entry, from
+the most to the least valuable one for the policy, so that a loader
+stopping at its capacity keeps the best entries.
+"""
+import os
+import pickle
+import struct
+import time
+from typing import Any, Iterator, Optional, Tuple
+
+SNAPSHOT_MAGIC = b"CACHSNAP"
+SNAPSHOT_VERSION = 2
+# magic, format version, entry count and length of the policy name,
+# which follows in UTF-8
+SNAPSHOT_HEADER = struct.Struct("=8sHQH")
+
+# key, item, policy metadata, wall-clock (time.time()) expiry or None,
+# so that the time between a dump and a load counts against the TTLs
+Record = Tuple[Any, Any, Any, Optional[float]]
+
+
+class SnapshotError(ValueError):
+    """Raised for a file that isn't a cache snapshot this code reads.
+    """
+
+
+def policy_name(cache) -> str:
+    """Returns the name of the policy of a cache, the class picking its
+    victims, which subclasses such as the synchronized variants share.
+    """
+    for cls in type(cache).__mro__:
+        if "_victim" in vars(cls):
+            return cls.__name__
+    return type(cache).__name__
+
+
+def write_snapshot(cache, path: str) -> int:
+    """Atomically writes the live entries of a policy cache to `path`,
+    returning how many were written.
+    """
+    now = cache.clock()
+    wall_now = time.time()
+    records = []
+    for key, meta in cache._ranked():
+        deadline = cache.deadlines.get(key)
+        if deadline is not None and deadline <= now:
+            continue
+        records.append((key, cache.cache_data[key], meta,
+                        None if deadline is None
+                        else wall_now + deadline - now))
+    policy = policy_name(cache).encode()
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                                         len(records), len(policy)))
+            f.write(policy)
+            for record in records:
+                pickle.dump(record, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return len(records)
+
+
+def read_snapshot(path: str) -> Tuple[str, int, Iterator[Record]]:
+    """Opens a snapshot, returning the policy that wrote it, its entry
+    count and an iterator reading its records one at a time.
+
+    Raises SnapshotError if the file isn't a snapshot of this version.
+    """
+    f = open(path, "rb")
+    try:
+        header = f.read(SNAPSHOT_HEADER.size)
+        if len(header) < SNAPSHOT_HEADER.size:
+            raise SnapshotError("truncated snapshot: {}".format(path))
+        magic, version, count, name_size = SNAPSHOT_HEADER.unpack(header)
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError("not a cache snapshot: {}".format(path))
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError("unsupported snapshot version {}: {}".format(
+                version, path))
+        policy = f.read(name_size).decode()
+    except BaseException:
+        f.close()
+        raise
+
+    def records():
+        with f:
+            for _ in range(count):
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    raise SnapshotError(
+                        "truncated snapshot: {}".format(path))
+
+    return policy, count, records()
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""Common base of the bounded caching policies.
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from base_caching import BaseCaching
+from cache_metrics import EVICTED, EXPIRED, CacheStats
+from cache_snapshot import policy_name, read_snapshot, write_snapshot
+
+
+class PolicyCaching(BaseCaching):
+    """Cache bounded by a per-instance capacity, evicting the entries its
+    subclass picks when a new item doesn't fit.
+
+    The capacity counts items, or the total `sizeof(item)` of the items
+    when a `sizeof` callback is given, e.g. `len` for byte strings.
+    Subclasses keep their ordering in `cache_data` (an OrderedDict) or in
+    their own structures, and implement the hooks below.
+
+    Entries put with a TTL, or `default_ttl`, expire that many seconds
+    later. Expired entries are dropped when read, before evicting live
+    ones for a new item, and by `sweep`, which only visits the expired
+    entries thanks to a heap of the deadlines.
+
+    Evicted and expired entries are passed to the listeners added with
+    `add_listener`, and the operations are counted in `stats`.
+    """
+
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, capacity: Optional[int] = None,
+                 sizeof: Optional[Callable[[Any], int]] = None,
+                 default_ttl: Optional[float] = None):
+        """Initializes the cache with `capacity`, BaseCaching.MAX_ITEMS
+        by default.
+        """
+        super().__init__()
+        self.cache_data = OrderedDict()
+        if capacity is None:
+            capacity = BaseCaching.MAX_ITEMS
+        self.capacity = capacity
+        self.sizeof = sizeof
+        self.size = 0  # Items held, or their total size with sizeof
+        self.sizes = {}  # Size of each item, with sizeof
+        self.default_ttl = default_ttl
+        self.deadlines = {}  # Expiry time of the entries with a TTL
+        # (deadline, tie breaker, key), possibly outdated
+        self.expiry_heap = []
+        self.__tickets = itertools.count()
+        self.sweeper = None
+        self.__sweeper_stopped = threading.Event()
+        self.listeners = []
+        self.stats = CacheStats()
+
+    @property
+    def slots(self) -> int:
+        """Number of entries the cache is sized for: its capacity, or the
+        entries it holds when the capacity counts sizes.
+        """
+        if self.sizeof is None:
+            return self.capacity
+        return max(len(self.cache_data), 1)
+
+    def weigh(self, item) -> int:
+        """Returns how much of the capacity an item takes."""
+        return 1 if self.sizeof is None else self.sizeof(item)
+
+    def put(self, key, item, ttl: Optional[float] = None):
+        """Adds an item to the cache, evicting entries until it fits.
+
+        The entry expires after `ttl` seconds, `default_ttl` if None, or
+        never if both are None.
+        """
+        stats = self.stats
+        if stats.sample_every and stats.sample():
+            start = time.perf_counter_ns()
+            self.__put(key, item, ttl)
+            stats.latencies["put"].record(time.perf_counter_ns() - start)
+        else:
+            self.__put(key, item, ttl)
+
+    def __put(self, key, item, ttl: Optional[float]):
+        """Adds an item to the cache."""
+        if key is None or item is None:
+            return
+        if self.__expired(key):
+            self.expire(key)
+        weight = self.weigh(item)
+        if weight > self.capacity:
+            self.pop(key)
+            return
+        if self.size + weight > self.capacity and self.deadlines:
+            self.sweep()
+        present = key in self.cache_data
+        if present:
+            self.size -= self.sizes.pop(key, 1)
+        else:
+            self._admit(key)
+        while self.size + weight > self.capacity:
+            victim = self._victim(key)
+            if victim is None:
+                break
+            self.discard(victim)
+        self.cache_data[key] = item
+        self.size += weight
+        if self.sizeof is not None:
+            self.sizes[key] = weight
+        if ttl is None:
+            ttl = self.default_ttl
+        if ttl is not None:
+            self.__set_deadline(key, self.clock() + ttl)
+        else:
+            self.deadlines.pop(key, None)
+        if present:
+            self.stats.updates += 1
+            self._update(key)
+        else:
+            self.stats.inserts += 1
+            self._insert(key)
+
+    def get(self, key):
+        """Retrieves an item by key, recording the access."""
+        stats = self.stats
+        if stats.sample_every and stats.sample():
+            start = time.perf_counter_ns()
+            item = self.__get(key)
+            stats.latencies["get"].record(time.perf_counter_ns() - start)
+            return item
+        return self.__get(key)
+
+    def __get(self, key):
+        """Retrieves an item by key."""
+        if key is None or key not in self.cache_data:
+            self.stats.misses += 1
+            return None
+        if self.__expired(key):
+            self.expire(key)
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        self._hit(key)
+        return self.cache_data[key]
+
+    def peek(self, key):
+        """Returns the live item of a key, or None, without recording an
+        access or counting it in the stats.
+        """
+        if key is None or key not in self.cache_data or self.__expired(key):
+            return None
+        return self.cache_data[key]
+
+    def pop(self, key):
+        """Removes an entry without counting it as an eviction, returning
+        its item or None.
+        """
+        if key not in self.cache_data:
+            return None
+        self._forget(key)
+        self.size -= self.sizes.pop(key, 1)
+        self.deadlines.pop(key, None)
+        return self.cache_data.pop(key)
+
+    def discard(self, key):
+        """Evicts an entry, notifying the listeners."""
+        item = self.pop(key)
+        self.stats.evictions += 1
+        self.__notify(key, item, EVICTED)
+
+    def expire(self, key):
+        """Drops an expired entry, notifying the listeners."""
+        item = self.pop(key)
+        self.stats.expirations += 1
+        self.__notify(key, item, EXPIRED)
+
+    def add_listener(self, listener: Callable[[Any, Any, str], None]):
+        """Calls `listener(key, item, reason)` for each entry evicted or
+        expired from now on, `reason` being EVICTED or EXPIRED.
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Any, Any, str], None]):
+        """Stops calling a listener."""
+        self.listeners.remove(listener)
+
+    def __notify(self, key, item, reason: str):
+        """Passes an entry leaving the cache to the listeners."""
+        for listener in self.listeners:
+            listener(key, item, reason)
+
+    def sample_latencies(self, every: int = 64):
+        """Times one in `every` gets and puts into the histograms of
+        `stats`, or none if 0.
+        """
+        self.stats.sample_every = self.stats.countdown = every
+
+    def metrics(self) -> Dict:
+        """Returns a snapshot of the stats, size and capacity."""
+        metrics = self.stats.snapshot()
+        metrics.update(size=self.size, entries=len(self.cache_data),
+                       capacity=self.capacity)
+        return metrics
+
+    def __expired(self, key) -> bool:
+        """Tells whether an entry has a TTL that ran out."""
+        deadline = self.deadlines.get(key)
+        return deadline is not None and deadline <= self.clock()
+
+    def __set_deadline(self, key, deadline: float):
+        """Records when an entry expires, rebuilding the heap once it
+        holds mostly outdated deadlines.
+        """
+        self.deadlines[key] = deadline
+        heapq.heappush(self.expiry_heap,
+                       (deadline, next(self.__tickets), key))
+        if len(self.expiry_heap) > 2 * len(self.deadlines) + 64:
+            self.expiry_heap = [(deadline, next(self.__tickets), key)
+                                for key, deadline in self.deadlines.items()]
+            heapq.heapify(self.expiry_heap)
+
+    def sweep(self, limit: Optional[int] = None) -> int:
+        """Drops up to `limit` expired entries (all if None), returning
+        how many were dropped.
+        """
+        now = self.clock()
+        heap = self.expiry_heap
+        expired = 0
+        while heap and heap[0][0] <= now:
+            if limit is not None and expired >= limit:
+                break
+            deadline, _, key = heapq.heappop(heap)
+            if self.deadlines.get(key) == deadline:
+                self.expire(key)
+                expired += 1
+        return expired
+
+    def start_sweeper(self, interval: float = 1.0,
+                      limit: Optional[int] = None) -> threading.Thread:
+        """Starts a daemon thread calling `sweep(limit)` every `interval`
+        seconds until `stop_sweeper` is called.
+
+        The cache is then used from two threads, so it must be
+        synchronized, e.g. `synchronized(LRUCache)(capacity)`.
+        """
+        self.stop_sweeper()
+        stopped = self.__sweeper_stopped = threading.Event()
+
+        def run():
+            while not stopped.wait(interval):
+                self.sweep(limit)
+
+        self.sweeper = threading.Thread(target=run, daemon=True,
+                                        name="cache-sweeper")
+        self.sweeper.start()
+        return self.sweeper
+
+    def stop_sweeper(self):
+        """Stops the background sweeper, if any."""
+        if self.sweeper is not None:
+            self.__sweeper_stopped.set()
+            self.sweeper.join()
+            self.sweeper = None
+
+    def dump(self, path: str) -> int:
+        """Atomically writes the live entries and their policy metadata
+        to a snapshot at `path`, returning how many were written.
+        """
+        return write_snapshot(self, path)
+
+    def load(self, path: str) -> int:
+        """Restores the entries of a snapshot below the ones cached, from
+        the most valuable one until the cache is full, returning how many
+        were restored.
+
+        The policy metadata is only used if the snapshot was written by
+        the same policy. The entries keep their wall-clock expiry, the ones
+        past it by now being skipped.
+        """
+        policy, _, records = read_snapshot(path)
+        restore_meta = policy == policy_name(self)
+        now = self.clock()
+        wall_now = time.time()
+        restored = 0
+        try:
+            for key, item, meta, expires in records:
+                if key in self.cache_data or (expires is not None
+                                              and expires <= wall_now):
+                    continue
+                weight = self.weigh(item)
+                if self.size + weight > self.capacity:
+                    if self.sizeof is None:
+                        break
+                    continue
+                self.cache_data[key] = item
+                self.size += weight
+                if self.sizeof is not None:
+                    self.sizes[key] = weight
+                if expires is not None:
+                    self.__set_deadline(key, now + expires - wall_now)
+                self._restore(key, meta if restore_meta else None)
+                restored += 1
+        finally:
+            records.close()
+        return restored
+
+    def _ranked(self):
+        """Yields the keys with their policy metadata, from the most to
+        the least valuable; by default from the end of cache_data, where
+        most policies keep the entries they evict last.
+        """
+        for key in reversed(self.cache_data):
+            yield key, None
+
+    def _restore(self, key, meta):
+        """Records a key just loaded into cache_data as the least valuable
+        one, `meta` being what `_ranked` yielded with it or None.
+        """
+        self.cache_data.move_to_end(key, last=False)
+
+    def _admit(self, key):
+        """Prepares for a new key, before entries are evicted for it."""
+
+    def _insert(self, key):
+        """Records a key just added to cache_data."""
+
+    def _update(self, key):
+        """Records a new item put under a key already cached."""
+
+    def _hit(self, key):
+        """Records a key read by `get`."""
+
+    def _forget(self, key):
+        """Drops a key about to be removed from cache_data."""
+
+    def _victim(self, exclude):
+        """Returns the key to evict next other than `exclude`, the key
+        being put, or None.
+        """
+        raise NotImplementedError(
+            "_victim must be implemented in your cache class")
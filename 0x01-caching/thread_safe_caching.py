@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Thread-safe and lock-striped variants of the caching policies.
+"""
+import threading
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+from base_caching import BaseCaching
+from cache_metrics import CacheStats
+
+
+# Methods of the policies that read or change their state
+SYNCHRONIZED_METHODS = ("put", "get", "peek", "pop", "discard", "expire",
+                        "sweep", "metrics", "dump", "load", "print_cache")
+
+
+def _locked(method: Callable) -> Callable:
+    """Wraps a method so that it runs holding the instance's lock."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def synchronized(policy: type) -> type:
+    """Returns a subclass of a caching policy whose operations each hold
+    a per-instance reentrant lock, e.g. `synchronized(LRUCache)(8)`.
+    """
+    namespace = {
+        "__doc__": "{} whose operations hold `self.lock`.".format(
+            policy.__name__),
+        "__module__": __name__,
+    }
+    for name in SYNCHRONIZED_METHODS:
+        if hasattr(policy, name):
+            namespace[name] = _locked(getattr(policy, name))
+
+    def __init__(self, *args, **kwargs):
+        """Initializes the cache and its lock."""
+        self.lock = threading.RLock()
+        policy.__init__(self, *args, **kwargs)
+
+    namespace["__init__"] = __init__
+    return type("Synchronized" + policy.__name__, (policy,), namespace)
+
+
+class ShardedCache:
+    """Cache striped over independent shards of one policy, each behind
+    its own lock, so that threads working on different keys don't
+    contend for a single lock.
+
+    Keys are assigned to shards by hash and the capacity is split evenly
+    between the shards, so each shard evicts on its own.
+    """
+
+    def __init__(self, policy: type, shards: int = 16,
+                 capacity: Optional[int] = None, **kwargs: Any):
+        """Creates `shards` instances of `policy`, sharing `capacity`
+        (BaseCaching.MAX_ITEMS per shard if None). Other keyword
+        arguments are passed to every shard.
+        """
+        if capacity is None:
+            capacity = BaseCaching.MAX_ITEMS * shards
+        assert 0 < shards <= capacity
+        shard_policy = synchronized(policy)
+        self.capacity = capacity
+        self.shards = [
+            shard_policy(capacity=capacity // shards
+                         + (1 if i < capacity % shards else 0), **kwargs)
+            for i in range(shards)
+        ]
+
+    def shard(self, key):
+        """Returns the shard holding a key."""
+        return self.shards[hash(key) % len(self.shards)]
+
+    def put(self, key, item, ttl: Optional[float] = None):
+        """Adds an item to the shard of its key."""
+        if key is None or item is None:
+            return
+        self.shard(key).put(key, item, ttl)
+
+    def get(self, key):
+        """Retrieves an item from the shard of its key."""
+        if key is None:
+            return None
+        return self.shard(key).get(key)
+
+    def peek(self, key):
+        """Returns an item from the shard of its key without recording an
+        access.
+        """
+        if key is None:
+            return None
+        return self.shard(key).peek(key)
+
+    def pop(self, key):
+        """Removes an entry from the shard of its key."""
+        if key is None:
+            return None
+        return self.shard(key).pop(key)
+
+    def sweep(self, limit: Optional[int] = None) -> int:
+        """Drops up to `limit` expired entries from each shard, returning
+        how many were dropped.
+        """
+        return sum(shard.sweep(limit) for shard in self.shards)
+
+    def add_listener(self, listener: Callable[[Any, Any, str], None]):
+        """Adds an eviction listener to every shard."""
+        for shard in self.shards:
+            shard.add_listener(listener)
+
+    def sample_latencies(self, every: int = 64):
+        """Times one in `every` operations of each shard."""
+        for shard in self.shards:
+            with shard.lock:
+                shard.sample_latencies(every)
+
+    def metrics(self) -> Dict:
+        """Returns the stats of all the shards added up."""
+        stats = []
+        size = entries = 0
+        for shard in self.shards:
+            with shard.lock:
+                stats.append(shard.stats)
+                size += shard.size
+                entries += len(shard.cache_data)
+        metrics = CacheStats.merged(stats).snapshot()
+        metrics.update(size=size, entries=entries, capacity=self.capacity)
+        return metrics
+
+    @property
+    def cache_data(self) -> dict:
+        """Snapshot of the entries of all the shards."""
+        data = {}
+        for shard in self.shards:
+            with shard.lock:
+                data.update(shard.cache_data)
+        return data
+
+    def __len__(self) -> int:
+        """Number of entries in all the shards."""
+        return sum(len(shard.cache_data) for shard in self.shards)
+
+    def print_cache(self):
+        """Prints the entries of all the shards."""
+        data = self.cache_data
+        print("Current cache:")
+        for key in sorted(data.keys()):
+            print("{}: {}".format(key, data.get(key)))
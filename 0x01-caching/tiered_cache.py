@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""Two-tier cache: an in-process policy cache (L1) in front of a store
+shared by the worker processes (L2), which also carries invalidations
+so that a write in one worker drops the stale L1 copies of the others.
+"""
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class SqliteStore:
+    """L2 store in a SQLite file shared by the processes of a host.
+
+    Keys and items are pickled, so keys must pickle to the same bytes
+    when equal, as str, int and tuples of them do. Invalidations are
+    rows of a log table that each subscriber reads past its last id.
+
+    Invalidations are kept INVALIDATION_RETENTION seconds. A subscriber
+    idle for longer finds the ids after its last one pruned, and its
+    poll returns None for "unknown", on which the whole L1 is dropped.
+    """
+
+    INVALIDATION_RETENTION = 60.0  # Seconds invalidations are kept
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        """Opens or creates the store at `path`."""
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=timeout,
+                                  check_same_thread=False,
+                                  isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS entries "
+            "(key BLOB PRIMARY KEY, item BLOB NOT NULL, expires REAL)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS invalidations "
+            "(id INTEGER PRIMARY KEY AUTOINCREMENT, origin TEXT NOT NULL, "
+            "key BLOB NOT NULL, created REAL NOT NULL)")
+        self.last_invalidation = self.db.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM invalidations").fetchone()[0]
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Returns the live items of the keys found, in one query."""
+        return {key: item
+                for key, (item, _) in self.get_many_with_ttl(keys).items()}
+
+    def get_many_with_ttl(self, keys: Iterable[Hashable]
+                          ) -> Dict[Hashable, Tuple[Any, Optional[float]]]:
+        """Returns the live items of the keys found with the seconds they
+        have left, None for no expiry, in one query.
+        """
+        blobs = {pickle.dumps(key): key for key in keys}
+        if not blobs:
+            return {}
+        found = {}
+        blob_list = list(blobs)
+        now = time.time()
+        with self.lock:
+            # Stays under SQLite's default limit of 999 parameters
+            for start in range(0, len(blob_list), 900):
+                chunk = blob_list[start:start + 900]
+                rows = self.db.execute(
+                    "SELECT key, item, expires FROM entries WHERE key IN "
+                    "({}) AND (expires IS NULL OR expires > ?)".format(
+                        ",".join("?" * len(chunk))),
+                    chunk + [now])
+                for blob, item, expires in rows:
+                    found[blobs[blob]] = (
+                        pickle.loads(item),
+                        None if expires is None else expires - now)
+        return found
+
+    def put_many(self, items: Dict[Hashable, Any],
+                 ttl: Optional[float] = None):
+        """Stores items, expiring after `ttl` seconds if given, in one
+        transaction.
+        """
+        expires = None if ttl is None else time.time() + ttl
+        rows = [(pickle.dumps(key), pickle.dumps(item), expires)
+                for key, item in items.items()]
+        with self.lock:
+            with self.db:
+                self.db.execute("BEGIN")
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", rows)
+
+    def delete_many(self, keys: Iterable[Hashable]):
+        """Removes keys from the store."""
+        rows = [(pickle.dumps(key),) for key in keys]
+        with self.lock:
+            with self.db:
+                self.db.execute("BEGIN")
+                self.db.executemany("DELETE FROM entries WHERE key = ?", rows)
+
+    def publish(self, origin: str, keys: Iterable[Hashable]):
+        """Logs the invalidation of keys by `origin`, pruning the ones
+        older than INVALIDATION_RETENTION.
+        """
+        now = time.time()
+        rows = [(origin, pickle.dumps(key), now) for key in keys]
+        with self.lock:
+            with self.db:
+                self.db.execute("BEGIN")
+                self.db.executemany(
+                    "INSERT INTO invalidations (origin, key, created) "
+                    "VALUES (?, ?, ?)", rows)
+                self.db.execute(
+                    "DELETE FROM invalidations WHERE created < ?",
+                    (now - self.INVALIDATION_RETENTION,))
+
+    def poll(self, origin: str) -> Optional[List[Hashable]]:
+        """Returns the keys invalidated by others since the last poll, or
+        None if some of them were pruned before this poll.
+        """
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT id, key, origin FROM invalidations WHERE id > ? "
+                "ORDER BY id", (self.last_invalidation,)).fetchall()
+            if not rows:
+                return []
+            # AUTOINCREMENT ids have no holes but the pruned rows
+            pruned = rows[0][0] > self.last_invalidation + 1
+            self.last_invalidation = rows[-1][0]
+        if pruned:
+            return None
+        return [pickle.loads(key) for _, key, sender in rows
+                if sender != origin]
+
+    def close(self):
+        """Closes the database."""
+        self.db.close()
+
+
+class RedisStore:
+    """L2 store on a Redis server, through any client with the redis-py
+    interface (`mget`, `pipeline`, `delete`, `publish`, `pubsub`), e.g.
+    `redis.Redis()` or a fake one in tests.
+
+    Keys are named `prefix` + repr(key), so they need a stable repr, and
+    items are pickled. Invalidations go through a pub/sub channel.
+    """
+
+    def __init__(self, client, prefix: str = "cache:",
+                 channel: str = "cache:invalidations"):
+        """Wraps a connected client."""
+        self.client = client
+        self.prefix = prefix
+        self.channel = channel
+        self.pubsub = client.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.subscribe(channel)
+
+    def name(self, key: Hashable) -> str:
+        """Returns the Redis key of a cache key."""
+        return self.prefix + repr(key)
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Returns the items of the keys found, in one MGET."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self.client.mget([self.name(key) for key in keys])
+        return {key: pickle.loads(value)
+                for key, value in zip(keys, values) if value is not None}
+
+    def get_many_with_ttl(self, keys: Iterable[Hashable]
+                          ) -> Dict[Hashable, Tuple[Any, Optional[float]]]:
+        """Returns the items of the keys found with the seconds they have
+        left, None for no expiry, in one pipelined round-trip.
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(self.name(key))
+            pipe.pttl(self.name(key))
+        replies = pipe.execute()
+        found = {}
+        for key, value, pttl in zip(keys, replies[::2], replies[1::2]):
+            # PTTL is -1 without expiry, -2 if the key just expired
+            if value is None or pttl == -2:
+                continue
+            found[key] = (pickle.loads(value),
+                          None if pttl < 0 else pttl / 1000)
+        return found
+
+    def put_many(self, items: Dict[Hashable, Any],
+                 ttl: Optional[float] = None):
+        """Stores items, expiring after `ttl` seconds if given, in one
+        pipelined round-trip.
+        """
+        pipe = self.client.pipeline(transaction=False)
+        px = None if ttl is None else max(int(ttl * 1000), 1)
+        for key, item in items.items():
+            pipe.set(self.name(key), pickle.dumps(item), px=px)
+        pipe.execute()
+
+    def delete_many(self, keys: Iterable[Hashable]):
+        """Removes keys from the store."""
+        names = [self.name(key) for key in keys]
+        if names:
+            self.client.delete(*names)
+
+    def publish(self, origin: str, keys: Iterable[Hashable]):
+        """Broadcasts the invalidation of keys by `origin`."""
+        self.client.publish(self.channel, pickle.dumps((origin, list(keys))))
+
+    def poll(self, origin: str) -> List[Hashable]:
+        """Returns the keys invalidated by others since the last poll."""
+        keys = []
+        while True:
+            message = self.pubsub.get_message(timeout=0)
+            if message is None:
+                return keys
+            if message.get("type") != "message":
+                continue
+            sender, invalidated = pickle.loads(message["data"])
+            if sender != origin:
+                keys.extend(invalidated)
+
+    def close(self):
+        """Unsubscribes from the invalidations."""
+        self.pubsub.close()
+
+
+class TieredCache:
+    """Reads through an L1 policy cache to an L2 store, and writes
+    through both. L1 copies expire with their L2 entries.
+
+    Every write or invalidation is published on the L2, and the keys
+    published by other workers are dropped from the L1 at most every
+    `poll_interval` seconds, on the next operation or on `sync()`. If
+    the L2 pruned invalidations this worker hadn't read yet, its whole
+    L1 is dropped instead.
+    """
+
+    def __init__(self, l1, l2, ttl: Optional[float] = None,
+                 poll_interval: float = 1.0):
+        """Puts the items in the L2 with `ttl` if given."""
+        self.l1 = l1
+        self.l2 = l2
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.origin = uuid.uuid4().hex
+        self.polled = time.monotonic()
+
+    def sync(self) -> int:
+        """Drops from the L1 the keys other workers invalidated, or all of
+        them if the L2 lost track of the invalidations, returning how
+        many.
+        """
+        self.polled = time.monotonic()
+        keys = self.l2.poll(self.origin)
+        if keys is None:
+            keys = list(self.l1.cache_data)
+        for key in keys:
+            self.l1.pop(key)
+        return len(keys)
+
+    def __maybe_sync(self):
+        """Syncs if the last poll is older than poll_interval."""
+        if time.monotonic() - self.polled >= self.poll_interval:
+            self.sync()
+
+    def get(self, key):
+        """Returns an item from the L1, or from the L2 then kept in L1."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Returns the items found for keys, fetching the L1 misses from
+        the L2 in one round-trip.
+        """
+        self.__maybe_sync()
+        found = {}
+        missing = []
+        for key in keys:
+            item = self.l1.get(key)
+            if item is None:
+                missing.append(key)
+            else:
+                found[key] = item
+        if missing:
+            fetched = self.l2.get_many_with_ttl(missing)
+            for key, (item, ttl) in fetched.items():
+                # Expires from the L1 when it does from the L2
+                self.l1.put(key, item, ttl)
+                found[key] = item
+        return found
+
+    def put(self, key, item):
+        """Writes an item through the L1 and the L2."""
+        self.put_many({key: item})
+
+    def put_many(self, items: Dict[Hashable, Any]):
+        """Writes items through the L1 and the L2 in one round-trip, and
+        invalidates the other workers' copies.
+        """
+        items = {key: item for key, item in items.items()
+                 if key is not None and item is not None}
+        if not items:
+            return
+        self.__maybe_sync()
+        self.l2.put_many(items, self.ttl)
+        for key, item in items.items():
+            self.l1.put(key, item, self.ttl)
+        self.l2.publish(self.origin, items)
+
+    def invalidate(self, *keys: Hashable):
+        """Removes keys from both tiers and from the other workers' L1."""
+        for key in keys:
+            self.l1.pop(key)
+        self.l2.delete_many(keys)
+        self.l2.publish(self.origin, keys)
@@ -1,19 +1,21 @@
 #!/usr/bin/env python3
 """A basic Flask application.
 """
-from flask import Flask, render_template
+from app_factory import create_app
 
 
-app = Flask(__name__)
-app.url_map.strict_slashes = False  # Allow trailing slashes in routes
+class Config:
+    """Configuration class of the application.
+    """
+    BABEL = False  # No internationalization yet
+    INDEX_TEMPLATE = "0-index.html"  # Page served at /
 
 
-@app.route('/')
-def get_index() -> str:
-    """Render the home/index page.
-    """
-    return render_template('0-index.html')  # Serve the index HTML template
+app = create_app(Config)  # Build the application from the shared factory
+i18n = app.extensions["i18n"]  # Per-request routines of the application
+get_index = i18n.get_index  # Renders the home/index page
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)  # Start the Flask app on host 0.0.0.0 and port 5000
+    # Start the Flask app on all available interfaces at port 5000
+    app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Application factory of the i18n apps, which the numbered apps
+configure.
+
+Flask-Babel, the user store, the render cache and the HTTP cache are
+only imported by the apps that use them.
+"""
+from typing import Dict, Optional, Tuple, Union
+
+from flask import Flask, Response, g, render_template, request
+
+
+class Config:
+    """Default configuration of the i18n apps.
+    """
+    LANGUAGES = ["en", "fr"]  # Supported languages for translation
+    BABEL_DEFAULT_LOCALE = "en"  # Default locale for the application
+    BABEL_DEFAULT_TIMEZONE = "UTC"  # Default timezone for the application
+    INDEX_TEMPLATE = "0-index.html"  # Page served at /
+    BABEL = True  # Whether to set up Flask-Babel
+    # Where get_locale looks, in order, among "query" (locale parameter),
+    # "user", "header" (locale header) and "accept" (Accept-Language)
+    LOCALE_SOURCES = ()
+    TIMEZONE_SELECTOR = False  # Whether to select the timezone per request
+    USERS = None  # Sample users by login_as id, no login if None
+    USER_DATABASE = None  # SQLite file of the users, the sample users if None
+    RENDER_CACHE = False  # Whether to cache the rendered index pages
+    PRELOAD_CATALOGS = False  # Whether to load all catalogs at startup
+    HTTP_CACHE = False  # Whether to send ETags and answer with 304s
+    HTTP_MAX_AGE = 0  # Seconds caches may serve the index without checking
+
+
+class I18n:
+    """Per-request routines of an i18n app, configured by its config.
+    """
+
+    def __init__(self, app: Flask):
+        """Sets up the resolver, user store and render cache the config
+        asks for.
+        """
+        from i18n_resolver import LocaleResolver
+        config = app.config
+        self.template = config["INDEX_TEMPLATE"]
+        sources = config["LOCALE_SOURCES"]
+        self.query_locale = "query" in sources
+        self.user_locale = "user" in sources
+        self.header_locale = "header" in sources
+        self.accept_language = "accept" in sources
+        self.resolver = LocaleResolver(config["LANGUAGES"],
+                                       config["BABEL_DEFAULT_LOCALE"],
+                                       config["BABEL_DEFAULT_TIMEZONE"])
+        self.user_store = None
+        if config["USERS"] is not None:
+            from user_store import make_user_store, parse_user_id
+            self.parse_user_id = parse_user_id
+            self.user_store = make_user_store(config["USERS"],
+                                              config["USER_DATABASE"])
+        self.render_cache = None
+        if config["RENDER_CACHE"]:
+            from i18n_rendering import RenderCache
+            self.render_cache = RenderCache()
+        self.http_cache = None  # Set up by create_app, once Babel is
+
+    def get_user(self) -> Optional[Dict]:
+        """Retrieves the user of the 'login_as' query parameter, or None.
+        """
+        user_id = self.parse_user_id(request.args.get('login_as'))
+        if user_id is None:
+            return None
+        return self.user_store.get(user_id)
+
+    def before_request(self) -> None:
+        """Stores the user of the request in the global object."""
+        g.user = self.get_user()
+
+    def get_locale(self) -> str:
+        """Selects the first supported locale among the sources of the
+        config, or the default locale.
+        """
+        user = getattr(g, 'user', None)
+        return self.resolver.locale(
+            request.args.get('locale', '') if self.query_locale else '',
+            user['locale'] if user and self.user_locale else None,
+            request.headers.get('locale', '') if self.header_locale else '',
+            request.headers.get('Accept-Language', '')
+            if self.accept_language else None)
+
+    def get_timezone(self) -> str:
+        """Selects the timezone of the query string or of the user, if
+        valid, or the default timezone.
+        """
+        timezone = request.args.get('timezone', '').strip()
+        user = getattr(g, 'user', None)
+        if not timezone and user:
+            timezone = user['timezone']
+        return self.resolver.timezone(timezone)
+
+    def page_vary(self) -> Optional[Tuple[str, Optional[str]]]:
+        """Returns what the index page shows of the logged in user, or None
+        without one; a user without a name still differs from no user.
+        """
+        user = getattr(g, 'user', None)
+        return None if user is None else ("user", user.get('name'))
+
+    def render_index(self) -> str:
+        """Renders the home/index page, or returns its cached render."""
+        if self.render_cache is None:
+            return render_template(self.template)
+        return self.render_cache.render(self.template, vary=self.page_vary())
+
+    def get_index(self) -> Union[str, Response]:
+        """Serves the home/index page, or a 304 if the HTTP cache is on and
+        the client has it already.
+        """
+        if self.http_cache is None:
+            return self.render_index()
+        vary = self.page_vary()
+        return self.http_cache.respond(self.render_index, vary=vary,
+                                       private=vary is not None)
+
+
+def create_app(config: Optional[type] = None) -> Flask:
+    """Builds an i18n app from the defaults of Config overridden by the
+    attributes of `config`.
+    """
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    if config is not None:
+        app.config.from_object(config)
+    # Allow URLs with or without trailing slashes
+    app.url_map.strict_slashes = False
+    i18n = app.extensions["i18n"] = I18n(app)
+    if i18n.user_store is not None:
+        app.before_request(i18n.before_request)
+    if app.config["BABEL"]:
+        from flask_babel import Babel
+        locale_selector = \
+            i18n.get_locale if app.config["LOCALE_SOURCES"] else None
+        timezone_selector = \
+            i18n.get_timezone if app.config["TIMEZONE_SELECTOR"] else None
+        babel = Babel()
+        if hasattr(babel, "localeselector"):  # Flask-Babel < 3
+            babel.init_app(app)
+            if locale_selector is not None:
+                babel.localeselector(locale_selector)
+            if timezone_selector is not None:
+                babel.timezoneselector(timezone_selector)
+        else:
+            babel.init_app(app, locale_selector=locale_selector,
+                           timezone_selector=timezone_selector)
+    app.add_url_rule('/', 'get_index', i18n.get_index)
+    if app.config["BABEL"] and app.config["PRELOAD_CATALOGS"]:
+        from i18n_rendering import preload_catalogs
+        preload_catalogs(app)
+    if app.config["BABEL"] and app.config["HTTP_CACHE"]:
+        from http_caching import HttpCache
+        i18n.http_cache = HttpCache(app, i18n.template,
+                                    app.config["LOCALE_SOURCES"],
+                                    app.config["HTTP_MAX_AGE"])
+    return app
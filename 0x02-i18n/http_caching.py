@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""HTTP caching of the pages of the i18n apps: strong ETags, Vary and
+Cache-Control headers, and 304 answers to conditional requests.
+"""
+import hashlib
+import os
+from typing import Callable, Hashable, Iterable, Optional
+
+from flask import Flask, Response, make_response, request
+from flask_babel import get_locale, get_timezone
+
+from i18n_rendering import translation_directories
+
+# Request headers the locale is read from, by source of LOCALE_SOURCES
+LOCALE_HEADERS = {"header": "locale", "accept": "Accept-Language"}
+
+
+def content_version(app: Flask, template: str) -> str:
+    """Returns a digest of a template's source and of the compiled
+    catalogs of the app's languages, which change with any deployment
+    that changes the pages.
+    """
+    digest = hashlib.sha1()
+    source = app.jinja_env.loader.get_source(app.jinja_env, template)[0]
+    digest.update(source.encode())
+    for directory in translation_directories(app):
+        for language in app.config["LANGUAGES"]:
+            path = os.path.join(directory, language, "LC_MESSAGES",
+                                "messages.mo")
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+
+class HttpCache:
+    """Conditional responses of a page, whose ETag is computed from the
+    template, locale, timezone and user before rendering, so that a
+    request revalidating a page it has costs no render.
+    """
+
+    def __init__(self, app: Flask, template: str,
+                 locale_sources: Iterable[str], max_age: int = 0):
+        """Sets the page's headers from the config's locale sources;
+        shared caches may keep public pages for `max_age` seconds.
+        """
+        self.template = template
+        self.version = content_version(app, template)
+        # Query parameters are part of the URL caches key on, headers not
+        self.vary = [LOCALE_HEADERS[source] for source in locale_sources
+                     if source in LOCALE_HEADERS]
+        self.max_age = max_age
+
+    def etag(self, vary: Optional[Hashable] = None) -> str:
+        """Returns the ETag of the page in the current request, `vary`
+        capturing what else than the locale and timezone it shows.
+        """
+        key = (self.version, self.template, str(get_locale()),
+               str(get_timezone()), vary)
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def respond(self, render: Callable[[], str],
+                vary: Optional[Hashable] = None,
+                private: bool = False) -> Response:
+        """Returns a 304 if the request has the page already, else the
+        page `render` returns, with its caching headers. `private` pages,
+        such as those of a logged in user, are kept out of shared caches.
+        """
+        etag = self.etag(vary)
+        if request.if_none_match.contains_weak(etag):
+            response = make_response("", 304)
+        else:
+            response = make_response(render())
+        response.set_etag(etag)
+        response.vary.update(self.vary)
+        if private:
+            response.cache_control.private = True
+        else:
+            response.cache_control.public = True
+        response.cache_control.max_age = self.max_age
+        return response
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the i18n apps.
+
+Run from this directory, naming the benchmarks to run (all by default):
+    python3 i18n_benchmark.py selectors
+    python3 i18n_benchmark.py startup --baseline <git revision>
+"""
+import argparse
+import io
+import os
+import random
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pytz
+
+from i18n_resolver import LocaleResolver
+
+LANGUAGES = ["en", "fr"]
+LOCALES = ["en", "fr", "de", "kg", "", "EN", "fr_FR"]
+TIMEZONES = ["Europe/Paris", "US/Central", "Vulcan", "Europe/London", "",
+             "utc", "Mars/Olympus"]
+
+
+def fuzz_requests(count: int, seed: int = 0) -> List[Tuple]:
+    """Returns `count` random (query locale, user locale, header locale,
+    timezone) inputs of the selectors, from a small mix of valid, invalid
+    and missing values as seen in real traffic.
+    """
+    rng = random.Random(seed)
+    return [(rng.choice(LOCALES), rng.choice(LOCALES + [None]),
+             rng.choice(LOCALES), rng.choice(TIMEZONES))
+            for _ in range(count)]
+
+
+def naive_locale(query: str, user: Optional[str], header: str) -> str:
+    """Locale selection as 7-app.py did it before the resolver."""
+    if query in LANGUAGES:
+        return query
+    if user in LANGUAGES:
+        return user
+    if header in LANGUAGES:
+        return header
+    return "en"
+
+
+def naive_timezone(timezone: str) -> str:
+    """Timezone selection as 7-app.py did it before the resolver."""
+    try:
+        return pytz.timezone(timezone).zone
+    except pytz.exceptions.UnknownTimeZoneError:
+        return "UTC"
+
+
+def bench_selectors(count: int = 100000) -> None:
+    """Time per request of the locale and timezone selectors, before and
+    with the memoized resolver, on fuzzed inputs.
+    """
+    requests = fuzz_requests(count)
+    resolver = LocaleResolver(LANGUAGES, "en", "UTC")
+    print("selectors, {} fuzzed requests (us/request)".format(count))
+    start = time.perf_counter()
+    naive = [(naive_locale(query, user, header), naive_timezone(timezone))
+             for query, user, header, timezone in requests]
+    naive_us = (time.perf_counter() - start) / count * 1e6
+    start = time.perf_counter()
+    memoized = [(resolver.locale(query, user, header),
+                 resolver.timezone(timezone))
+                for query, user, header, timezone in requests]
+    memoized_us = (time.perf_counter() - start) / count * 1e6
+    assert memoized == naive
+    print("  naive {:8.3f} | resolver {:8.3f}".format(naive_us, memoized_us))
+
+
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+{setup}
+app = __import__({module!r}).app
+imported = time.perf_counter()
+response = app.test_client().get("/?login_as=1&locale=fr")
+assert response.status_code == 200
+print(imported - start, time.perf_counter() - imported)
+"""
+
+# Setup of the baseline apps, timed with their import: gives Flask-Babel
+# >= 3 back the selector decorators they use, which it dropped
+BABEL_SELECTORS_SHIM = """
+import flask_babel
+if not hasattr(flask_babel.Babel, "localeselector"):
+    init_app = flask_babel.Babel.init_app
+
+    def remembering_init_app(self, app, *args, **kwargs):
+        self.app = app
+        init_app(self, app, *args, **kwargs)
+
+    def selector(name):
+        def decorator(self, f):
+            setattr(flask_babel.get_babel(self.app), name, f)
+            return f
+        return decorator
+
+    flask_babel.Babel.init_app = remembering_init_app
+    flask_babel.Babel.localeselector = selector("locale_selector")
+    flask_babel.Babel.timezoneselector = selector("timezone_selector")
+"""
+
+MAIN_GUARD = "if __name__ == '__main__':"
+
+
+def git_root_commit() -> str:
+    """Returns the first commit of the repository, whose apps predate the
+    factory and are the default startup baseline.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    return subprocess.run(
+        ["git", "rev-list", "--max-parents=0", "HEAD"], cwd=here,
+        check=True, capture_output=True, text=True).stdout.split()[-1]
+
+
+def extract_revision(revision: str, directory: str) -> None:
+    """Extracts the files of this directory at a git revision into
+    `directory`, completing the app whose `__main__` guard was left
+    without a body (6-app.py before the resolver) so that it imports.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    top, prefix = subprocess.run(
+        ["git", "rev-parse", "--show-toplevel", "--show-prefix"], cwd=here,
+        check=True, capture_output=True, text=True).stdout.split("\n")[:2]
+    # git archive runs from the top, as it rejects some subdirectories
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", "{}:{}".format(revision, prefix)],
+        cwd=top, check=True, capture_output=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+    for number in range(8):
+        path = os.path.join(directory, "{}-app.py".format(number))
+        if not os.path.exists(path):
+            continue
+        with open(path) as f:
+            source = f.read()
+        if source.rstrip().endswith(MAIN_GUARD):
+            with open(path, "w") as f:
+                f.write(source.rstrip() + "\n    pass\n")
+
+
+def time_startup(module: str, directory: str, runs: int,
+                 setup: str = "") -> Optional[Tuple[float, float]]:
+    """Returns the best import and first request times of an app in
+    fresh interpreters, in seconds, or None if it fails to start.
+    """
+    script = STARTUP_SCRIPT.format(module=module, setup=setup)
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", script],
+                                cwd=directory, capture_output=True, text=True)
+        if output.returncode != 0:
+            return None
+        timings.append([float(t) for t in output.stdout.split()])
+    return (min(timing[0] for timing in timings),
+            min(timing[1] for timing in timings))
+
+
+def bench_startup(runs: int = 5, baseline: Optional[str] = None) -> None:
+    """Import time of each numbered app and time of its first request, in
+    fresh interpreters (best of `runs`), for the apps of the `baseline`
+    git revision (the first commit by default) and the current ones.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    baseline = baseline or git_root_commit()
+    print("startup, best of {} fresh processes (ms), {} -> current".format(
+        runs, baseline))
+    with tempfile.TemporaryDirectory() as baseline_directory:
+        extract_revision(baseline, baseline_directory)
+        for number in range(8):
+            module = "{}-app".format(number)
+            columns = []
+            for timing in (time_startup(module, baseline_directory, runs,
+                                        BABEL_SELECTORS_SHIM),
+                           time_startup(module, directory, runs)):
+                columns.append(["{:>7}".format("failed")] * 2 if timing is None
+                               else ["{:7.1f}".format(t * 1e3)
+                                     for t in timing])
+            print("  {:6} import {} -> {} | first request {} -> {}".format(
+                module, columns[0][0], columns[1][0], columns[0][1],
+                columns[1][1]))
+
+
+def bench_http(count: int = 2000) -> None:
+    """Time and body bytes per request of 7-app.py's index, served in full
+    and answered with a 304 to requests revalidating the ETag of a
+    previous response.
+    """
+    app = __import__("7-app").app
+    client = app.test_client()
+    urls = ["/?login_as={}&locale={}".format(user, locale)
+            for user in ("", "1", "2", "3", "4") for locale in LOCALES]
+    etags = {url: client.get(url).headers["ETag"] for url in urls}
+    print("http, {} requests to 7-app (per request)".format(count))
+    for status, conditional in ((200, False), (304, True)):
+        sent = 0
+        start = time.perf_counter()
+        for i in range(count):
+            url = urls[i % len(urls)]
+            headers = {"If-None-Match": etags[url]} if conditional else {}
+            response = client.get(url, headers=headers)
+            assert response.status_code == status
+            sent += len(response.data)
+        elapsed_us = (time.perf_counter() - start) / count * 1e6
+        print("  {} {:8.1f} us {:6.0f} bytes".format(
+            status, elapsed_us, sent / count))
+
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {
+    "selectors": bench_selectors,
+    "startup": bench_startup,
+    "http": bench_http,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Runs the benchmarks named on the command line, or all of them.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*", metavar="benchmark",
+                        help="one of {} (all by default)".format(
+                            ", ".join(BENCHMARKS)))
+    parser.add_argument("--baseline",
+                        help="git revision of the apps the startup "
+                        "benchmark compares to (the first commit by "
+                        "default)")
+    args = parser.parse_args(argv)
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark: {}".format(name))
+    for name in args.names or BENCHMARKS:
+        if name == "startup":
+            bench_startup(baseline=args.baseline)
+        else:
+            BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Translation catalogs loaded at startup and cached page renders for the
+i18n apps.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from flask import Flask, render_template
+from flask_babel import force_locale, get_locale, get_timezone, \
+    get_translations
+
+
+def translation_directories(app: Flask) -> List[str]:
+    """Returns the absolute translation directories of an app."""
+    directories = app.config.get("BABEL_TRANSLATION_DIRECTORIES",
+                                 "translations")
+    return [os.path.join(app.root_path, directory)
+            for directory in directories.split(";")]
+
+
+def compile_catalogs(app: Flask) -> List[str]:
+    """Compiles the messages.po catalogs of the app's languages whose .mo
+    file is missing or older, returning the paths compiled.
+    """
+    from babel.messages.mofile import write_mo
+    from babel.messages.pofile import read_po
+    compiled = []
+    for directory in translation_directories(app):
+        for language in app.config["LANGUAGES"]:
+            base = os.path.join(directory, language, "LC_MESSAGES",
+                                "messages")
+            po_path, mo_path = base + ".po", base + ".mo"
+            if not os.path.exists(po_path):
+                continue
+            if (os.path.exists(mo_path) and os.path.getmtime(mo_path)
+                    >= os.path.getmtime(po_path)):
+                continue
+            with open(po_path, "rb") as f:
+                catalog = read_po(f, locale=language)
+            with open(mo_path, "wb") as f:
+                write_mo(f, catalog)
+            compiled.append(mo_path)
+    return compiled
+
+
+def preload_catalogs(app: Flask) -> Dict[str, Any]:
+    """Compiles and loads the catalogs of all the app's languages into
+    Flask-Babel's translation cache, so that no request loads one from
+    disk; returns the translations by language.
+    """
+    compile_catalogs(app)
+    catalogs = {}
+    with app.test_request_context():
+        for language in app.config["LANGUAGES"]:
+            with force_locale(language):
+                catalogs[language] = get_translations()
+    return catalogs
+
+
+class RenderCache:
+    """Pages rendered by template, locale, timezone and the parts of the
+    context the page shows, keeping the `maxsize` most recently used.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """Initializes an empty cache."""
+        self.maxsize = maxsize
+        self.pages: "OrderedDict[Tuple, str]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def render(self, template: str, vary: Optional[Hashable] = None,
+               **context: Any) -> str:
+        """Renders a template in the current request, or returns its
+        cached render for the same locale, timezone and `vary` value,
+        which must capture whatever else the page depends on.
+        """
+        key = (template, str(get_locale()), str(get_timezone()), vary)
+        with self.lock:
+            page = self.pages.get(key)
+            if page is not None:
+                self.pages.move_to_end(key)
+                return page
+        page = render_template(template, **context)
+        with self.lock:
+            self.pages[key] = page
+            if len(self.pages) > self.maxsize:
+                self.pages.popitem(last=False)
+        return page
+
+    def clear(self):
+        """Drops all the cached pages, e.g. after a catalog update."""
+        with self.lock:
+            self.pages.clear()
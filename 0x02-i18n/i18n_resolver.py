@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Memoized locale and timezone resolution for the i18n apps.
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+from zoneinfo import available_timezones
+
+# Names of the host's own zone, which some databases list too
+HOST_ZONES = ("localtime", "posixrules")
+_zone_names: Optional[Dict[str, str]] = None  # Lowercase to canonical name
+
+
+def zone_database() -> Iterable[str]:
+    """Returns the names of the timezone database zoneinfo reads, or of
+    the one pytz ships on hosts without any, e.g. Windows or slim images
+    with neither a system zoneinfo nor the tzdata package.
+    """
+    names = available_timezones()
+    if names:
+        return names
+    import pytz  # Installed with Flask-Babel
+    return pytz.all_timezones_set
+
+
+def canonical_zone(timezone: str) -> Optional[str]:
+    """Returns the IANA name of a timezone, matched case-insensitively
+    like pytz does, or None if it's unknown.
+
+    Only the names of zone_database() are valid, but for HOST_ZONES:
+    zoneinfo opens any file of the database, "localtime" included,
+    whose zone depends on the host.
+    """
+    global _zone_names
+    if _zone_names is None:
+        # Listed once, as it reads the whole database
+        _zone_names = {name.lower(): name for name in zone_database()
+                       if name not in HOST_ZONES}
+    return _zone_names.get(timezone.lower())
+
+
+def best_accept_match(accept_language: str,
+                      languages: Iterable[str]) -> Optional[str]:
+    """Returns the language of `languages` an Accept-Language header
+    prefers, or None.
+    """
+    from werkzeug.datastructures import LanguageAccept
+    from werkzeug.http import parse_accept_header
+    return parse_accept_header(accept_language, LanguageAccept).best_match(
+        list(languages))
+
+
+class LocaleResolver:
+    """Resolves the locale and timezone of requests, remembering the
+    result for each combination of inputs, invalid ones included, in
+    bounded LRU caches so that a request usually costs one dict lookup.
+    """
+
+    def __init__(self, languages: Iterable[str], default_locale: str,
+                 default_timezone: str, maxsize: int = 4096):
+        """Sets the supported languages and the fallbacks."""
+        self.languages = tuple(languages)  # In order of preference
+        self.supported = frozenset(self.languages)  # For O(1) checks
+        self.default_locale = default_locale
+        self.default_timezone = default_timezone
+        self.locale = lru_cache(maxsize=maxsize)(self.resolve_locale)
+        self.timezone = lru_cache(maxsize=maxsize)(self.resolve_timezone)
+
+    def resolve_locale(self, query: str, user: Optional[str] = None,
+                       header: str = "",
+                       accept_language: Optional[str] = None) -> str:
+        """Returns the first supported locale among the `locale` query
+        parameter, the user's locale and the `locale` header, then the
+        best match of the Accept-Language header if given, then the
+        default locale. `locale(...)` is the memoized version.
+        """
+        for locale in (query, user, header):
+            if locale in self.supported:
+                return locale
+        if accept_language:
+            return (best_accept_match(accept_language, self.languages)
+                    or self.default_locale)
+        return self.default_locale
+
+    def resolve_timezone(self, timezone: Optional[str]) -> str:
+        """Returns the canonical name of a timezone, or the default one if
+        it's unknown. `timezone(...)` is the memoized version.
+        """
+        return canonical_zone((timezone or "").strip()) \
+            or self.default_timezone
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""User stores behind the `login_as` lookups of the i18n apps.
+
+sqlite3 and asyncio are imported by the stores and methods using them,
+keeping them out of the startup of the apps using the sample users.
+"""
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional
+
+USER_FIELDS = ("name", "locale", "timezone")
+USER_ID_RANGE = range(-2 ** 63, 2 ** 63)  # SQLite INTEGER values
+
+
+def parse_user_id(value: Optional[str]) -> Optional[int]:
+    """Returns the user id of a `login_as` value, or None if it isn't one
+    or is out of the range of ids a store can hold.
+    """
+    try:
+        user_id = int(value)
+    except (TypeError, ValueError):
+        return None
+    return user_id if user_id in USER_ID_RANGE else None
+
+
+class UserStore:
+    """Users by id; subclasses implement `get_many`.
+    """
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        """Returns a user, or None if there's none with that id."""
+        return self.get_many([user_id]).get(user_id)
+
+    def get_many(self, user_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Returns the users found among the ids, by id."""
+        raise NotImplementedError("get_many must be implemented")
+
+
+class MemoryUserStore(UserStore):
+    """Users held in a dict, such as the sample users of the apps.
+    """
+
+    def __init__(self, users: Dict[int, Dict]):
+        """Wraps a dict of users by id."""
+        self.users = users
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        """Returns a user, or None if there's none with that id."""
+        return self.users.get(user_id)
+
+    def get_many(self, user_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Returns the users found among the ids, by id."""
+        return {user_id: self.users[user_id] for user_id in user_ids
+                if user_id in self.users}
+
+
+class ConnectionPool:
+    """Pool of SQLite connections shared by the threads of a process,
+    opened on first use and reused afterwards.
+    """
+
+    def __init__(self, path: str, size: int = 4):
+        """Allows up to `size` connections to the database at `path`."""
+        self.path = path
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self) -> Iterator["sqlite3.Connection"]:
+        """Lends a connection, waiting for one if all are in use."""
+        import sqlite3
+        self.slots.acquire()
+        try:
+            try:
+                db = self.idle.get_nowait()
+            except queue.Empty:
+                db = sqlite3.connect(self.path, check_same_thread=False)
+            try:
+                yield db
+            finally:
+                self.idle.put(db)
+        finally:
+            self.slots.release()
+
+    def close(self):
+        """Closes the idle connections."""
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class SqliteUserStore(UserStore):
+    """Users in a SQLite table, looked up by primary key through a
+    connection pool, one query per batch.
+    """
+
+    # Ids per query, under SQLite's default limit of 999 parameters
+    BATCH = 900
+
+    def __init__(self, path: str, pool_size: int = 4):
+        """Opens the database at `path`, creating the users table."""
+        self.pool = ConnectionPool(path, pool_size)
+        with self.pool.connection() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS users (id INTEGER "
+                       "PRIMARY KEY, name TEXT, locale TEXT, timezone TEXT)")
+            db.commit()
+
+    def add_many(self, users: Dict[int, Dict]):
+        """Inserts or replaces users by id."""
+        with self.pool.connection() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?)",
+                [(user_id,) + tuple(user.get(field) for field in USER_FIELDS)
+                 for user_id, user in users.items()])
+            db.commit()
+
+    def get_many(self, user_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Returns the users found among the ids, by id."""
+        user_ids = list(user_ids)
+        users = {}
+        with self.pool.connection() as db:
+            for start in range(0, len(user_ids), self.BATCH):
+                batch = user_ids[start:start + self.BATCH]
+                rows = db.execute(
+                    "SELECT id, name, locale, timezone FROM users "
+                    "WHERE id IN ({})".format(",".join("?" * len(batch))),
+                    batch)
+                for user_id, *values in rows:
+                    users[user_id] = dict(zip(USER_FIELDS, values))
+        return users
+
+
+_MISSING = object()  # Cached absence of a user
+
+
+class CachedUserStore(UserStore):
+    """Read-through cache of another store for a process, keeping found
+    users for `ttl` seconds and ids without a user for `negative_ttl`
+    seconds, up to `maxsize` ids, least recently used first out.
+    """
+
+    def __init__(self, store: UserStore, ttl: float = 60.0,
+                 negative_ttl: float = 5.0, maxsize: int = 4096):
+        """Wraps a store."""
+        self.store = store
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.maxsize = maxsize
+        self.entries = OrderedDict()  # id: (expiry time, user or _MISSING)
+        self.lock = threading.Lock()
+
+    def __lookup(self, user_id: int, now: float):
+        """Returns the cached user or _MISSING of an id, or None."""
+        entry = self.entries.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self.entries[user_id]
+            return None
+        self.entries.move_to_end(user_id)
+        return entry[1]
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        """Returns a user, or None if there's none with that id."""
+        with self.lock:
+            user = self.__lookup(user_id, time.monotonic())
+        if user is None:
+            return self.get_many([user_id]).get(user_id)
+        return None if user is _MISSING else user
+
+    def get_many(self, user_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Returns the users found among the ids, by id, querying the
+        store once for all the ids not cached.
+        """
+        users = {}
+        missing = []
+        now = time.monotonic()
+        with self.lock:
+            for user_id in user_ids:
+                user = self.__lookup(user_id, now)
+                if user is None:
+                    missing.append(user_id)
+                elif user is not _MISSING:
+                    users[user_id] = user
+        if not missing:
+            return users
+        found = self.store.get_many(missing)
+        now = time.monotonic()
+        with self.lock:
+            for user_id in missing:
+                user = found.get(user_id)
+                if user is None:
+                    entry = (now + self.negative_ttl, _MISSING)
+                else:
+                    entry = (now + self.ttl, user)
+                    users[user_id] = user
+                self.entries[user_id] = entry
+                self.entries.move_to_end(user_id)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return users
+
+    def invalidate(self, user_id: int):
+        """Forgets the cached user of an id."""
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    async def aget(self, user_id: int) -> Optional[Dict]:
+        """Returns a user without blocking the event loop, querying the
+        store in the default executor on a miss.
+        """
+        with self.lock:
+            user = self.__lookup(user_id, time.monotonic())
+        if user is not None:
+            return None if user is _MISSING else user
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get, user_id)
+
+    async def aget_many(self, user_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Returns the users found among the ids without blocking the
+        event loop.
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get_many,
+                                          list(user_ids))
+
+
+def make_user_store(users: Dict[int, Dict], database: Optional[str] = None,
+                    ttl: float = 60.0) -> UserStore:
+    """Returns the user store of the apps: the users of the users table of
+    a SQLite `database` behind a read-through cache, or the sample
+    `users` if no database is given.
+    """
+    if database is None:
+        return MemoryUserStore(users)
+    return CachedUserStore(SqliteUserStore(database), ttl)